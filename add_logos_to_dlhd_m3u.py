@@ -3,6 +3,14 @@ import re
 import difflib
 import logging
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from logo_index import INDEX_FILE, load_index, iter_logos
+from playlist import read_playlist
+
 logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
 
 LOGO_DIR = "./tv"
@@ -11,61 +19,138 @@ FALLBACK_LOGO_URL = GITHUB_LOGO_BASE_URL + "logos/misc/24-7/circle1-247.png"
 OUTPUT_FILE = "dlhd_with_logos.m3u"
 INPUT_FILE = "dlhd_with_country_categories.m3u"
 
+# Batch mode scores the whole playlist against all logos with NumPy (falls back to difflib per line without it)
+BATCH_MATCHING = True
+# Logo keys with the highest n-gram similarity that are re-scored with difflib per channel
+BATCH_SHORTLIST_SIZE = 40
+# Channel rows per matrix product, bounds the score matrix to CHUNK x logos floats
+BATCH_CHUNK_SIZE = 512
+
+# Set once the NumPy fallback has been reported, so long runs don't repeat the warning
+_warned_no_numpy = False
+
 def get_logo_files(base_dir):
-    """Recursively get all logo files under the tv directory."""
+    """Get all logo files under the tv directory from the shared logo index."""
     logo_map = {}
-    for root, _, files in os.walk(base_dir):
-        for f in files:
-            if f.lower().endswith((".png", ".jpg", ".jpeg", ".webp")):
-                key = os.path.splitext(f)[0].lower()
-                logo_map[key] = os.path.join(root, f)
+    for path, f, _ in iter_logos(load_index(base_dir, INDEX_FILE)):
+        logo_map[os.path.splitext(f)[0].lower()] = path
     logging.info(f"Indexed {len(logo_map)} logos from {base_dir}")
     return logo_map
 
+def normalize_channel_name(channel_name):
+    return re.sub(r'[^a-z0-9 ]', '', channel_name.lower())
+
+def logo_url_for(logo_map, key):
+    relative_path = os.path.relpath(logo_map[key], LOGO_DIR).replace("\\", "/")
+    return GITHUB_LOGO_BASE_URL + relative_path
+
 def best_logo_match(channel_name, logo_map):
     """Find best logo match using fuzzy matching with difflib."""
-    normalized = re.sub(r'[^a-z0-9 ]', '', channel_name.lower())
+    normalized = normalize_channel_name(channel_name)
     best = difflib.get_close_matches(normalized, logo_map.keys(), n=1, cutoff=0.7)
     if best:
-        relative_path = os.path.relpath(logo_map[best[0]], LOGO_DIR).replace("\\", "/")
-        return GITHUB_LOGO_BASE_URL + relative_path
+        return logo_url_for(logo_map, best[0])
     # fallback
     return FALLBACK_LOGO_URL
 
-def add_logos_to_m3u(input_path, output_path):
-    """Read M3U file, match each channel to a logo, and add tvg-logo attribute."""
-    logos = get_logo_files(LOGO_DIR)
-    with open(input_path, "r", encoding="utf-8") as infile:
-        lines = infile.readlines()
+def char_ngrams(text, n=3):
+    """Padded character n-grams with counts. Separators are unified so "sky-sport" and "sky sport" agree."""
+    padded = f" {re.sub(r'[^a-z0-9]+', ' ', text).strip()} "
+    grams = {}
+    for i in range(len(padded) - n + 1):
+        gram = padded[i:i + n]
+        grams[gram] = grams.get(gram, 0) + 1
+    return grams
+
+def ngram_matrix(names, vocab):
+    """
+    Rows of L2-normalized n-gram count vectors restricted to vocab.
+    Norms use every n-gram of the name so the dot product is the true cosine similarity.
+    """
+    matrix = np.zeros((len(names), len(vocab)), dtype=np.float32)
+    for row, name in enumerate(names):
+        grams = char_ngrams(name)
+        norm = sum(c * c for c in grams.values()) ** 0.5 or 1.0
+        for gram, count in grams.items():
+            col = vocab.get(gram)
+            if col is not None:
+                matrix[row, col] = count / norm
+    return matrix
+
+def best_logo_matches(channel_names, logo_map):
+    """
+    Batch version of best_logo_match. Returns (logo url, difflib score) per channel name.
+
+    All distinct names and all logo keys become character n-gram vectors and are scored
+    against each other with one matrix product per chunk. The BATCH_SHORTLIST_SIZE most
+    similar keys per name are then passed to difflib.get_close_matches with the usual 0.7
+    cutoff, so the winner and its score follow the same rules as the per-line matcher.
+    """
+    normalized = [normalize_channel_name(name) for name in channel_names]
+    queries = list(dict.fromkeys(normalized))
+    keys = list(logo_map.keys())
+    if not queries or not keys:
+        return [(FALLBACK_LOGO_URL, 0.0) for _ in channel_names]
+
+    # Only n-grams that occur in some channel name can contribute to a dot product
+    vocab = {}
+    for query in queries:
+        for gram in char_ngrams(query):
+            vocab.setdefault(gram, len(vocab))
+    logo_matrix = ngram_matrix(keys, vocab)
+    shortlist_size = min(BATCH_SHORTLIST_SIZE, len(keys))
 
-    output_lines = []
+    results = {}
+    for start in range(0, len(queries), BATCH_CHUNK_SIZE):
+        chunk = queries[start:start + BATCH_CHUNK_SIZE]
+        scores = ngram_matrix(chunk, vocab) @ logo_matrix.T
+        if shortlist_size < len(keys):
+            shortlists = np.argpartition(-scores, shortlist_size - 1, axis=1)[:, :shortlist_size]
+        else:
+            shortlists = np.tile(np.arange(len(keys)), (len(chunk), 1))
+        for query, shortlist in zip(chunk, shortlists):
+            best = difflib.get_close_matches(query, [keys[i] for i in shortlist], n=1, cutoff=0.7)
+            if best:
+                score = difflib.SequenceMatcher(None, best[0], query).ratio()
+                results[query] = (logo_url_for(logo_map, best[0]), score)
+            else:
+                results[query] = (FALLBACK_LOGO_URL, 0.0)
+
+    return [results[name] for name in normalized]
+
+def add_logos_to_entries(entries, logos):
+    """Match each playlist Entry to a logo and set its tvg-logo attribute. Returns (matched, fallbacks)."""
     match_count = 0
     fallback_count = 0
+    entries = [entry for entry in entries if entry.name]
 
-    for line in lines:
-        if line.startswith("#EXTINF"):
-            # Extract channel name after comma
-            match = re.search(r",(.+)", line)
-            if match:
-                channel_name = match.group(1).strip()
-                logo_url = best_logo_match(channel_name, logos)
-                if logo_url == FALLBACK_LOGO_URL:
-                    fallback_count += 1
-                else:
-                    match_count += 1
-
-                if 'tvg-logo="' in line:
-                    new_line = re.sub(r'tvg-logo="[^"]*"', f'tvg-logo="{logo_url}"', line)
-                else:
-                    new_line = line.strip().replace(",", f'" tvg-logo="{logo_url}",', 1)
-                output_lines.append(new_line + "\n")
-            else:
-                output_lines.append(line)
+    if BATCH_MATCHING and np is not None:
+        logo_urls = [url for url, _ in best_logo_matches([entry.name for entry in entries], logos)]
+    else:
+        global _warned_no_numpy
+        if BATCH_MATCHING and not _warned_no_numpy:
+            logging.warning("NumPy not installed, falling back to per-line difflib logo matching "
+                            "(over 10x slower); pip install numpy to enable batch matching.")
+            _warned_no_numpy = True
+        logo_urls = [best_logo_match(entry.name, logos) for entry in entries]
+
+    for entry, logo_url in zip(entries, logo_urls):
+        if logo_url == FALLBACK_LOGO_URL:
+            fallback_count += 1
         else:
-            output_lines.append(line)
+            match_count += 1
+        entry.attrs["tvg-logo"] = logo_url
+
+    return match_count, fallback_count
+
+def add_logos_to_m3u(input_path, output_path):
+    """Read M3U file, match each channel to a logo, and add tvg-logo attribute."""
+    logos = get_logo_files(LOGO_DIR)
+    playlist = read_playlist(input_path)
+
+    match_count, fallback_count = add_logos_to_entries(playlist.entries, logos)
 
-    with open(output_path, "w", encoding="utf-8") as outfile:
-        outfile.writelines(output_lines)
+    playlist.write(output_path)
 
     logging.info(f"✅ Completed logo matching. Matched: {match_count}, Fallbacks: {fallback_count}")
     logging.info(f"Output written to {output_path}")
@@ -3,6 +3,7 @@ import xml.etree.ElementTree as ET
 import requests
 import logging
 import json
+from datetime import date, timedelta
 
 # --- CONFIGURATION ---
 EPG_FILE = "epg.xml"
@@ -15,32 +16,48 @@ LOCAL_LOGO_DIR = ""  # leave empty if not used
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-def load_cache():
+# Bump whenever find_logo's matching rules or the URL layout change so cached results are dropped
+MATCH_RULES_VERSION = 1
+# Cached results not used by any run for this many days are evicted
+CACHE_MAX_AGE_DAYS = 30
+# A hit only moves last_used forward once it is this old, so the committed file stays
+# unchanged from day to day while no match changes
+CACHE_REFRESH_DAYS = CACHE_MAX_AGE_DAYS // 2
+
+def load_cache(version):
+    """
+    Load the memo of resolved logos. The whole memo is discarded when it was computed
+    against a different logo index or matching rules version.
+    """
     if os.path.exists(CACHE_FILE):
         try:
             with open(CACHE_FILE, "r") as f:
-                return json.load(f)
+                cache = json.load(f)
+            if cache.get("version") == version and isinstance(cache.get("entries"), dict):
+                return cache
+            logging.info("Logo cache is stale (logo tree or matching rules changed), starting fresh.")
         except Exception as e:
             logging.warning(f"Failed to load cache file: {e}")
-    return {}
+    return {"version": version, "entries": {}}
 
 def save_cache(cache):
+    """Evict entries unused for CACHE_MAX_AGE_DAYS, then write the memo atomically."""
+    cutoff = (date.today() - timedelta(days=CACHE_MAX_AGE_DAYS)).isoformat()
+    entries = cache["entries"]
+    for key in [k for k, v in entries.items() if v.get("last_used", "") < cutoff]:
+        del entries[key]
     try:
-        with open(CACHE_FILE, "w") as f:
+        tmp_path = CACHE_FILE + ".tmp"
+        with open(tmp_path, "w") as f:
             json.dump(cache, f)
+        os.replace(tmp_path, CACHE_FILE)
     except Exception as e:
         logging.warning(f"Failed to save cache file: {e}")
 
 import difflib
-import re
 
-def normalize_name(name: str) -> str:
-    name = name.lower()
-    name = re.sub(r'[\s_\-]+', '', name)
-    name = name.replace('&', 'and').replace('+', 'plus')
-    name = name.replace('hd', '').replace('fhd', '').replace('uhd', '')
-    name = re.sub(r'\b(tv|channel|network|sports?|extra|international|premium|the)\b', '', name)
-    return name.strip()
+from epg_reader import rewrite_epg
+from logo_index import LOGO_DIR, INDEX_FILE, INDEX_FORMAT, load_index, iter_logos, normalize_name
 
 GITHUB_LOGO_BASE = "https://raw.githubusercontent.com/ryandriscoll/LiveTv-English/main/tv/"
 
@@ -48,92 +65,151 @@ def to_github_url(local_path):
     rel_path = os.path.relpath(local_path, "./tv").replace("\\", "/")
     return f"{GITHUB_LOGO_BASE}{rel_path}"
 
-def find_logo(channel_id, channel_name, cache):
+class LogoIndex:
     """
-    Find a logo in ./tv recursively using intelligent name matching.
-    Uses normalized comparisons, substring checks, and fuzzy similarity scoring before falling back.
+    In-memory view of the ./tv logo tree, loaded once per run from the shared logo index.
+    Keeps the normalized filename keys that the exact, substring and fuzzy
+    passes of find_logo need, so no lookup has to touch the disk again.
     """
-    base_dir = "./tv"
-    logo_filename = f"{channel_id}.png"
-
-    # Check cache first
-    if channel_id in cache:
-        cached = cache[channel_id]
-        path = cached.get("url")
-        if path and os.path.exists(path.replace("file://", "")):
-            return path
-
-    # Build index of available logos
-    available = []
-    for root, _, files in os.walk(base_dir):
-        for f in files:
+
+    def __init__(self, base_dir=LOGO_DIR, index_path=INDEX_FILE):
+        self.base_dir = base_dir
+        # (normalized name, path) in walk order, used by the substring pass
+        self.entries = []
+        # normalized name -> first path seen, used by the exact pass
+        self.exact = {}
+        # normalized name -> last path seen, used by the fuzzy pass
+        self.candidates = {}
+
+        # Names are normalized once in logo_index.json and reused until ./tv changes
+        index = load_index(base_dir, index_path)
+        self.version = f"{INDEX_FORMAT}-{index['tree_hash']}"
+        fallback_path = os.path.join(base_dir, "logos", "misc", "circle1-247.png")
+        self.fallback = None
+        for path, f, fnorm in iter_logos(index):
             if f.endswith(".png"):
-                available.append((f, os.path.join(root, f)))
+                self.add(fnorm, path)
+            if path == fallback_path:
+                self.fallback = path
 
-    id_norm = normalize_name(channel_id)
+        logging.info(f"Indexed {len(self.entries)} logos from {base_dir}")
+
+    def add(self, fnorm, path):
+        self.entries.append((fnorm, path))
+        self.exact.setdefault(fnorm, path)
+        self.candidates[fnorm] = path
+
+    def __len__(self):
+        return len(self.entries)
+
+
+def find_logo(channel_id, channel_name, cache, logo_index):
+    """
+    Return the logo URL for a channel, memoized in the logo cache per (channel id, normalized name).
+    Fallback and empty results are cached too, so an unchanged channel costs one dict lookup.
+    """
     name_norm = normalize_name(channel_name)
+    key = f"{channel_id}|{name_norm}"
+    today = date.today()
+
+    cached = cache["entries"].get(key)
+    if cached is not None:
+        if cached.get("last_used", "") < (today - timedelta(days=CACHE_REFRESH_DAYS)).isoformat():
+            cached["last_used"] = today.isoformat()
+        return cached["url"]
+
+    logo_url, fallback = match_logo(channel_id, name_norm, logo_index)
+    cache["entries"][key] = {"url": logo_url, "fallback": fallback, "last_used": today.isoformat()}
+    return logo_url
+
+
+def match_logo(channel_id, name_norm, logo_index):
+    """
+    Find a logo in ./tv recursively using intelligent name matching.
+    Uses normalized comparisons, substring checks, and fuzzy similarity scoring before falling back.
+    Returns (logo url, whether the fallback was used).
+    """
+    id_norm = normalize_name(channel_id)
 
     # 1️⃣ Exact filename match
-    for f, path in available:
-        if normalize_name(os.path.splitext(f)[0]) == id_norm:
-            return to_github_url(path)
+    if id_norm in logo_index.exact:
+        return to_github_url(logo_index.exact[id_norm]), False
 
     # 2️⃣ Partial substring match
-    for f, path in available:
-        fnorm = normalize_name(os.path.splitext(f)[0])
+    for fnorm, path in logo_index.entries:
         if id_norm in fnorm or name_norm in fnorm:
-            return to_github_url(path)
+            return to_github_url(path), False
 
     # 3️⃣ Fuzzy similarity (difflib)
-    candidates = {normalize_name(os.path.splitext(f)[0]): path for f, path in available}
+    query = id_norm or name_norm
+    matcher = difflib.SequenceMatcher(None, query)
     best_match = None
     best_ratio = 0
-    for fnorm, path in candidates.items():
-        ratio = difflib.SequenceMatcher(None, id_norm or name_norm, fnorm).ratio()
+    for fnorm, path in logo_index.candidates.items():
+        # Length-only upper bound on the ratio; skip candidates that cannot win
+        total = len(query) + len(fnorm)
+        if total and 2.0 * min(len(query), len(fnorm)) / total <= best_ratio:
+            continue
+        matcher.set_seq2(fnorm)
+        if matcher.quick_ratio() <= best_ratio:
+            continue
+        ratio = matcher.ratio()
         if ratio > best_ratio:
             best_match, best_ratio = path, ratio
 
     if best_match and best_ratio >= 0.7:
-        return to_github_url(best_match)
+        return to_github_url(best_match), False
 
     # 4️⃣ Fallback logo
-    misc_fallback = "./tv/logos/misc/circle1-247.png"
-    if os.path.exists(misc_fallback):
+    if logo_index.fallback:
         logging.warning(f"No suitable match found for {channel_id}, using backup logo.")
-        logo_url = to_github_url(misc_fallback)
+        logo_url = to_github_url(logo_index.fallback)
     else:
         logo_url = ""
-    return logo_url
-
+    return logo_url, True
+
+
+def add_logo_to_channel(channel, cache, logo_index):
+    """Set the <icon> of a <channel> element. Returns True if a new <icon> was added."""
+    chan_id = channel.get("id")
+    chan_name = channel.get("name", "") or ""
+    logo_url = find_logo(chan_id, chan_name, cache, logo_index)
+
+    # Check if <icon> already exists
+    icon = channel.find("icon")
+    if icon is None:
+        icon = ET.SubElement(channel, "icon")
+        icon.set("src", logo_url)
+        return True
+    icon.set("src", logo_url)
+    return False
+
+def load_logo_matching():
+    """Return (logo_index, cache) ready for add_logo_to_channel."""
+    logo_index = LogoIndex(LOGO_DIR)
+    cache = load_cache(f"{logo_index.version}-{MATCH_RULES_VERSION}")
+    return logo_index, cache
 
 def main():
-    cache = load_cache()
-
-    tree = ET.parse(EPG_FILE)
-    root = tree.getroot()
+    logo_index, cache = load_logo_matching()
+    cached_before = len(cache["entries"])
 
     count_added = 0
-    for channel in root.findall("channel"):
-        chan_id = channel.get("id")
-        chan_name = channel.get("name", "") or ""
-        logo_url = find_logo(chan_id, chan_name, cache)
-
-        # Check if <icon> already exists
-        icon = channel.find("icon")
-        if icon is None:
-            icon = ET.SubElement(channel, "icon")
-            icon.set("src", logo_url)
+
+    def add_logo(channel):
+        nonlocal count_added
+        if channel.tag == "channel" and add_logo_to_channel(channel, cache, logo_index):
             count_added += 1
-        else:
-            icon.set("src", logo_url)
 
-    tree.write(OUTPUT_FILE, encoding="utf-8", xml_declaration=True)
+    # Stream the guide element by element instead of loading every <programme>
+    rewrite_epg(EPG_FILE, OUTPUT_FILE, add_logo)
     logging.info(f"Added/updated logos for {count_added} channels.")
     logging.info(f"Output saved to {OUTPUT_FILE}")
 
     # Save updated cache including fallback entries
+    logging.info(f"Logo cache: {cached_before} entries loaded, {len(cache['entries']) - cached_before} new matches computed.")
     save_cache(cache)
-    logging.info(f"Saved {len(cache)} entries to cache (including fallbacks).")
+    logging.info(f"Saved {len(cache['entries'])} entries to cache (including fallbacks).")
 
 
 if __name__ == "__main__":
@@ -5,6 +5,8 @@ import subprocess
 import logging
 import shutil
 
+import logo_index
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
 
@@ -85,11 +87,17 @@ def cleanup_repo():
                 logging.info(f"Removing .git folder: {git_path}")
                 shutil.rmtree(git_path, ignore_errors=True)
 
+def write_logo_index():
+    """Rebuild the shared logo index so the logo scripts don't have to walk ./tv themselves."""
+    index = logo_index.build_index(logo_index.LOGO_DIR)
+    logo_index.save_index(index, logo_index.INDEX_FILE)
+
 if __name__ == "__main__":
     if clone_repo():
         copy_folders()
         remove_symlinks_in_output()
         cleanup_repo()
+        write_logo_index()
         logging.info("✅ All folders have been copied successfully.")
     else:
         logging.error("❌ Repository cloning failed.")
\ No newline at end of file
@@ -0,0 +1,135 @@
+import os
+import gzip
+import xml.etree.ElementTree as ET
+from collections import namedtuple
+from datetime import datetime, timezone
+from xml.sax.saxutils import escape
+
+# One <channel> of an XMLTV guide. display_names keeps the raw text of every <display-name>
+# (None when empty) in document order so each consumer can apply its own cleanup.
+ChannelRecord = namedtuple("ChannelRecord", ["id", "display_names", "icon"])
+
+
+def open_epg(path):
+    """Open a plain or gzip-compressed XMLTV file for binary reading."""
+    if path.endswith(".gz"):
+        return gzip.open(path, "rb")
+    return open(path, "rb")
+
+
+def iter_elements(path):
+    """
+    Stream the top-level elements (<channel>, <programme>, ...) of an XMLTV file.
+
+    Yields (root, element) for each complete element, including its tail text. The element is
+    cleared and detached from the root as soon as the caller moves on, so memory stays flat no
+    matter how many programmes the guide holds. root keeps its tag, attributes and text for
+    callers that re-serialize the document.
+    """
+    with open_epg(path) as f:
+        root = None
+        pending = None
+        depth = 0
+        for event, elem in ET.iterparse(f, events=("start", "end")):
+            if event == "start":
+                depth += 1
+                if root is None:
+                    root = elem
+                elif depth == 2 and pending is not None:
+                    # A sibling starts, so the previous element's tail text is now known
+                    yield root, pending
+                    pending.clear()
+                    pending = None
+                    del root[:-1]
+                continue
+            depth -= 1
+            if depth == 1:
+                pending = elem
+            elif depth == 0 and pending is not None:
+                yield root, pending
+                pending.clear()
+                del root[:]
+
+
+def parse_xmltv_time(value):
+    """'20251018060000 +0100' -> POSIX timestamp, or None if it can't be parsed."""
+    if not value:
+        return None
+    try:
+        if len(value) > 14:
+            return datetime.strptime(value.strip(), "%Y%m%d%H%M%S %z").timestamp()
+        return datetime.strptime(value[:14], "%Y%m%d%H%M%S").replace(tzinfo=timezone.utc).timestamp()
+    except ValueError:
+        return None
+
+
+def parse_iso_time(value):
+    """
+    '2026-05-06T18:00:00Z' / '2026-05-06T19:00+01:00' -> aware datetime; no offset means UTC.
+    The trailing "Z" is handled here because datetime.fromisoformat only accepts it from
+    Python 3.11. Raises ValueError like fromisoformat, so it works as an argparse type.
+    """
+    if value.endswith(("Z", "z")):
+        value = value[:-1] + "+00:00"
+    moment = datetime.fromisoformat(value)
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment
+
+
+def channel_record(elem):
+    """Build a ChannelRecord from a <channel> element, e.g. one of an already parsed tree."""
+    icon = elem.find("icon")
+    return ChannelRecord(
+        elem.get("id"),
+        [dn.text for dn in elem.findall("display-name")],
+        icon.get("src") if icon is not None else None,
+    )
+
+
+def iter_channels(path, stop_after_channels=False):
+    """
+    Yield a ChannelRecord for every <channel> in an XMLTV file without building the tree.
+
+    With stop_after_channels=True parsing stops at the first <programme> that follows the
+    channel block, which is how most guides are laid out; leave it off for files such as our
+    own epg.xml where channels and programmes are interleaved.
+    """
+    seen_channel = False
+    for _, elem in iter_elements(path):
+        if elem.tag == "channel":
+            seen_channel = True
+            yield channel_record(elem)
+        elif elem.tag == "programme" and stop_after_channels and seen_channel:
+            return
+
+
+def rewrite_epg(path, output_path, transform):
+    """
+    Stream an XMLTV file to output_path, calling transform(element) on every top-level element
+    just before it is written. The result matches ElementTree.write(xml_declaration=True) on the
+    fully parsed tree, but only one element is ever held in memory. output_path may equal path:
+    the output goes to a temp file that replaces it at the end.
+    """
+    tmp_path = output_path + ".tmp"
+    root = None
+    with open(tmp_path, "w", encoding="utf-8", errors="xmlcharrefreplace") as out:
+        out.write("<?xml version='1.0' encoding='utf-8'?>\n")
+        for root_elem, elem in iter_elements(path):
+            if root is None:
+                root = root_elem
+                # Serialize the root start tag with ElementTree's own attribute escaping
+                empty_root = ET.tostring(ET.Element(root.tag, root.attrib), encoding="unicode")
+                out.write(empty_root[:-len(" />")] + ">")
+                if root.text:
+                    out.write(escape(root.text))
+            transform(elem)
+            out.write(ET.tostring(elem, encoding="unicode"))
+        if root is not None:
+            out.write(f"</{root.tag}>")
+
+    if root is None:
+        # No top-level elements at all; let ElementTree write the (tiny) document as-is
+        with open_epg(path) as f:
+            ET.ElementTree(ET.parse(f).getroot()).write(tmp_path, encoding="utf-8", xml_declaration=True)
+    os.replace(tmp_path, output_path)
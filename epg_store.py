@@ -0,0 +1,228 @@
+import os
+import sys
+import glob
+import sqlite3
+import logging
+import argparse
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from epg_reader import iter_elements, channel_record, parse_iso_time, parse_xmltv_time
+from guide_index import EPG_DIR, GUIDE_PATTERN, file_sha256
+
+# --- CONFIGURATION ---
+DB_FILE = "epg.sqlite"
+OWN_EPG_FILE = "epg.xml"
+EXPORT_FILE = "epg_export.xml"
+MAX_WORKERS = None  # parser processes; None uses every CPU
+
+# Bump whenever the schema or what read_guide() stores changes so old databases get rebuilt
+SCHEMA_VERSION = 2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS guides (
+    name TEXT PRIMARY KEY,
+    sha256 TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS channels (
+    guide TEXT NOT NULL,
+    id TEXT NOT NULL,
+    display_name TEXT,
+    icon TEXT,
+    xml TEXT NOT NULL,
+    PRIMARY KEY (guide, id)
+);
+CREATE TABLE IF NOT EXISTS programmes (
+    guide TEXT NOT NULL,
+    channel TEXT NOT NULL,
+    start INTEGER NOT NULL,
+    stop INTEGER NOT NULL,
+    title TEXT,
+    xml TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS channels_id ON channels (id);
+CREATE INDEX IF NOT EXISTS programmes_channel_start ON programmes (channel, start);
+CREATE INDEX IF NOT EXISTS programmes_start_stop ON programmes (start, stop);
+CREATE INDEX IF NOT EXISTS programmes_guide ON programmes (guide);
+CREATE INDEX IF NOT EXISTS programmes_channel_guide ON programmes (channel, guide);
+"""
+
+
+def connect(db_path=DB_FILE):
+    """Open (and if needed create or rebuild) the store."""
+    conn = sqlite3.connect(db_path)
+    if conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+        logging.info(f"Creating EPG store schema v{SCHEMA_VERSION} in {db_path}")
+        conn.executescript(
+            "DROP TABLE IF EXISTS guides; DROP TABLE IF EXISTS channels; DROP TABLE IF EXISTS programmes;"
+        )
+        conn.executescript(SCHEMA)
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        conn.commit()
+    return conn
+
+
+def read_guide(path):
+    """
+    Parse one XMLTV file into (channel rows, programme rows) ready for executemany.
+    Runs in a worker process; elements are cleared as soon as they are read.
+    """
+    guide = os.path.basename(path)
+    channels = []
+    programmes = []
+    for _, elem in iter_elements(path):
+        elem.tail = None
+        if elem.tag == "programme":
+            start = parse_xmltv_time(elem.get("start"))
+            if start is None:
+                continue
+            stop = parse_xmltv_time(elem.get("stop")) or start
+            title = elem.findtext("title")
+            programmes.append((guide, elem.get("channel"), int(start), int(stop), title,
+                               ET.tostring(elem, encoding="unicode")))
+        elif elem.tag == "channel":
+            record = channel_record(elem)
+            if record.id:
+                names = [name.strip() for name in record.display_names if name and name.strip()]
+                channels.append((guide, record.id, names[0] if names else None, record.icon,
+                                 ET.tostring(elem, encoding="unicode")))
+    return channels, programmes
+
+
+def ingest(db_path=DB_FILE, paths=None, max_workers=MAX_WORKERS):
+    """
+    Load our epg.xml and every epgshare guide into the store. Guides whose sha256 matches what
+    was loaded before are skipped; changed ones replace their old rows in one transaction each.
+    """
+    if paths is None:
+        paths = [OWN_EPG_FILE] + sorted(glob.glob(os.path.join(EPG_DIR, GUIDE_PATTERN)))
+    paths = [p for p in paths if os.path.exists(p)]
+    conn = connect(db_path)
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
+
+    loaded = dict(conn.execute("SELECT name, sha256 FROM guides"))
+    hashes = {path: file_sha256(path) for path in paths}
+    changed = [path for path in paths if loaded.get(os.path.basename(path)) != hashes[path]]
+    removed = set(loaded) - {os.path.basename(path) for path in paths}
+
+    for name in removed:
+        with conn:
+            delete_guide(conn, name)
+    logging.info(f"{len(changed)} of {len(paths)} guides changed, {len(removed)} removed")
+
+    total_channels = total_programmes = 0
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(read_guide, path): path for path in changed}
+        for future in as_completed(futures):
+            path = futures[future]
+            name = os.path.basename(path)
+            try:
+                channels, programmes = future.result()
+            except Exception as e:
+                logging.error(f"Failed to read {path}: {e}")
+                continue
+            with conn:
+                delete_guide(conn, name)
+                conn.executemany("INSERT OR REPLACE INTO channels VALUES (?, ?, ?, ?, ?)", channels)
+                conn.executemany("INSERT INTO programmes VALUES (?, ?, ?, ?, ?, ?)", programmes)
+                conn.execute("INSERT INTO guides VALUES (?, ?)", (name, hashes[path]))
+            total_channels += len(channels)
+            total_programmes += len(programmes)
+            logging.info(f"Loaded {name}: {len(channels)} channels, {len(programmes)} programmes")
+
+    if changed or removed:
+        conn.execute("ANALYZE")
+    conn.close()
+    logging.info(f"Ingested {total_channels} channels and {total_programmes} programmes into {db_path}")
+
+
+def delete_guide(conn, name):
+    conn.execute("DELETE FROM guides WHERE name = ?", (name,))
+    conn.execute("DELETE FROM channels WHERE guide = ?", (name,))
+    conn.execute("DELETE FROM programmes WHERE guide = ?", (name,))
+
+
+def export_xmltv(output_path, channel_ids=None, start=None, stop=None, db_path=DB_FILE):
+    """
+    Write an XMLTV file straight from SQL: the given channels (all when None) and their
+    programmes overlapping [start, stop] (POSIX timestamps, open-ended when None).
+
+    A channel id found in several guides is taken from one owner guide only, both its
+    <channel> and its programmes, so the same schedule is never written twice. The owner is
+    the first guide by name among those with programmes for the id in [start, stop] (epg.xml
+    sorts before the epgshare guides), which doesn't depend on the order guides were ingested in.
+    """
+    conn = connect(db_path)
+    id_filter = ""
+    if channel_ids is not None:
+        conn.execute("CREATE TEMP TABLE wanted (id TEXT PRIMARY KEY)")
+        conn.executemany("INSERT OR IGNORE INTO wanted VALUES (?)", ((i,) for i in channel_ids))
+        id_filter = "{column} IN (SELECT id FROM wanted)"
+
+    filters, params = [], []
+    if start is not None:
+        filters.append("p.stop >= ?")
+        params.append(int(start))
+    if stop is not None:
+        filters.append("p.start <= ?")
+        params.append(int(stop))
+    where = f"WHERE {' AND '.join(filters)}" if filters else ""
+
+    conn.execute("CREATE TEMP TABLE owners (id TEXT PRIMARY KEY, guide TEXT NOT NULL)")
+    owner_filters = filters + ([id_filter.format(column="p.channel")] if id_filter else [])
+    owner_where = f"WHERE {' AND '.join(owner_filters)}" if owner_filters else ""
+    conn.execute(
+        f"INSERT INTO owners SELECT p.channel, MIN(p.guide) FROM programmes p {owner_where} GROUP BY p.channel",
+        params,
+    )
+    # Channels without any programme in the window still get exported, from their first guide
+    channel_where = f"WHERE {id_filter.format(column='id')}" if id_filter else ""
+    conn.execute(f"INSERT OR IGNORE INTO owners SELECT id, MIN(guide) FROM channels {channel_where} GROUP BY id")
+
+    channel_count = programme_count = 0
+    tmp_path = output_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as out:
+        out.write("<?xml version='1.0' encoding='utf-8'?>\n<tv>")
+        for (xml,) in conn.execute(
+            "SELECT c.xml FROM owners o JOIN channels c ON c.id = o.id AND c.guide = o.guide ORDER BY o.id"
+        ):
+            out.write(xml)
+            channel_count += 1
+        for (xml,) in conn.execute(
+            f"SELECT p.xml FROM programmes p JOIN owners o ON p.channel = o.id AND p.guide = o.guide "
+            f"{where} ORDER BY p.channel, p.start",
+            params,
+        ):
+            out.write(xml)
+            programme_count += 1
+        out.write("</tv>")
+    os.replace(tmp_path, output_path)
+    conn.close()
+    logging.info(f"Exported {channel_count} channels and {programme_count} programmes to {output_path}")
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="SQLite store for epg.xml and the epgshare guides.")
+    arg_parser.add_argument("--db", default=DB_FILE)
+    commands = arg_parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("ingest", help="load epg.xml and epg/*.xml.gz (only what changed)")
+    export = commands.add_parser("export", help="write XMLTV for a subset of channels/time range")
+    export.add_argument("--output", default=EXPORT_FILE)
+    export.add_argument("--channels", help="comma-separated channel ids (default: all)")
+    export.add_argument("--start", type=parse_iso_time, help="ISO 8601, UTC if no offset")
+    export.add_argument("--stop", type=parse_iso_time, help="ISO 8601, UTC if no offset")
+    args = arg_parser.parse_args(argv)
+
+    if args.command == "ingest":
+        ingest(args.db)
+    else:
+        channel_ids = [c.strip() for c in args.channels.split(",") if c.strip()] if args.channels else None
+        start = args.start.timestamp() if args.start else None
+        stop = args.stop.timestamp() if args.stop else None
+        export_xmltv(args.output, channel_ids, start, stop, args.db)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    sys.exit(main())
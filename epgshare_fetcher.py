@@ -1,7 +1,14 @@
 import os
+import json
+import time
+import zlib
+import hashlib
 import requests
-import shutil
+import urllib3
 import logging
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from requests.adapters import HTTPAdapter
 from bs4 import BeautifulSoup
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
@@ -9,48 +16,294 @@ logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(me
 BASE_URL = "https://epgshare01.online/epgshare01/"
 EPG_DIR = "./epg"
 MAX_SIZE_MB = 100
+MAX_WORKERS = 8  # concurrent downloads; 1 downloads one file at a time
+CONNECT_TIMEOUT = 10  # seconds
+READ_TIMEOUT = 60  # seconds without receiving any data
+MANIFEST_FILE = "epgshare_manifest.json"  # URL -> ETag, Last-Modified, size, sha256 of the local copy
+CHUNK_SIZE = 64 * 1024
+RESUME_RETRIES = 2  # extra attempts per file; each resumes from the bytes already received
 
-def get_epg_links():
-    """Scrape BASE_URL for all .xml.gz links."""
-    logging.info(f"Fetching available .xml.gz files from {BASE_URL}")
-    response = requests.get(BASE_URL)
+# One finished download: path is None when the file was skipped or failed. size is the number of
+# bytes transferred, saved the bytes a 304 spared us, meta the new manifest entry (None if unchanged).
+DownloadResult = namedtuple("DownloadResult", ["url", "path", "size", "elapsed", "saved", "meta"])
+
+def load_manifest(path=MANIFEST_FILE):
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        return manifest if isinstance(manifest, dict) else {}
+    except Exception as e:
+        logging.warning(f"Failed to load manifest {path}: {e}")
+        return {}
+
+def save_manifest(manifest, path=MANIFEST_FILE):
+    """Write the manifest atomically so an interrupted run never leaves a half-written file."""
+    tmp_path = path + ".tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        logging.warning(f"Failed to save manifest {path}: {e}")
+
+def conditional_headers(entry, file_name_gz):
+    """If-None-Match / If-Modified-Since for a file we still have locally in the recorded size."""
+    if not entry or not os.path.exists(file_name_gz) or os.path.getsize(file_name_gz) != entry.get("size"):
+        return {}
+    headers = {}
+    if entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    if entry.get("last_modified"):
+        headers["If-Modified-Since"] = entry["last_modified"]
+    return headers
+
+def create_session(max_workers=MAX_WORKERS):
+    """A keep-alive session whose connection pool is large enough for every worker."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(max_workers, 1))
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+def get_epg_links(session, base_url=BASE_URL):
+    """Scrape base_url for all .xml.gz links."""
+    logging.info(f"Fetching available .xml.gz files from {base_url}")
+    response = session.get(base_url, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT))
     if response.status_code != 200:
-        raise Exception(f"Failed to access {BASE_URL} (status: {response.status_code})")
+        raise Exception(f"Failed to access {base_url} (status: {response.status_code})")
 
     soup = BeautifulSoup(response.text, "html.parser")
     links = [a["href"] for a in soup.find_all("a", href=True) if a["href"].endswith(".xml.gz")]
     logging.info(f"Found {len(links)} .xml.gz files.")
-    return [BASE_URL + link for link in links]
+    return [base_url + link for link in links]
+
+class GzipValidator:
+    """Checks a gzip stream chunk by chunk as it arrives (multi-member files included)."""
+
+    def __init__(self):
+        self.decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
 
-def download_epg(epg_url):
-    """Download .xml.gz file if under MAX_SIZE_MB."""
+    def feed(self, chunk):
+        """Raises zlib.error as soon as the data stops being valid gzip."""
+        while chunk:
+            self.decompressor.decompress(chunk)
+            if not self.decompressor.eof:
+                return
+            # A member ended; anything after it must be another gzip member
+            chunk = self.decompressor.unused_data
+            if chunk:
+                self.decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+
+    def finish(self):
+        """Raises ValueError if the stream was cut off mid-member."""
+        if not self.decompressor.eof:
+            raise ValueError("truncated gzip stream")
+
+def read_partial(tmp_path, epg_url):
+    """Return (bytes on disk, If-Range validator) for a resumable .part file of epg_url, else (0, None)."""
+    try:
+        with open(tmp_path + ".json", "r", encoding="utf-8") as f:
+            state = json.load(f)
+        offset = os.path.getsize(tmp_path)
+    except (OSError, ValueError):
+        return 0, None
+    if state.get("url") != epg_url or not state.get("validator"):
+        return 0, None
+    return offset, state["validator"]
+
+def remove_partial(tmp_path):
+    for path in (tmp_path, tmp_path + ".json"):
+        if os.path.exists(path):
+            os.remove(path)
+
+def resume_validator(response):
+    """A validator usable in If-Range: a strong ETag, else Last-Modified, else None."""
+    etag = response.headers.get("ETag")
+    if etag and not etag.startswith("W/"):
+        return etag
+    return response.headers.get("Last-Modified")
+
+def download_epg(epg_url, session, entry=None):
+    """
+    Download .xml.gz file if under MAX_SIZE_MB. entry is the file's manifest record from the
+    last run; when the local copy is intact the request is conditional and a 304 costs no
+    download and no disk write.
+
+    The body goes to a .part file next to the target while the size cap is enforced and the gzip
+    stream is validated chunk by chunk; the guide is only renamed into place once complete, so
+    epg/ never holds a truncated or oversized file. A transfer that breaks off keeps its .part
+    file and is resumed with a Range request, up to RESUME_RETRIES times in this run and again
+    on the next one.
+    """
+    start = time.perf_counter()
     os.makedirs(EPG_DIR, exist_ok=True)
     file_name_gz = os.path.join(EPG_DIR, os.path.basename(epg_url))
+    tmp_path = file_name_gz + ".part"
+    headers = conditional_headers(entry, file_name_gz)
 
-    # Check file size before downloading
-    head = requests.head(epg_url)
-    size = int(head.headers.get("Content-Length", 0)) / (1024 * 1024)
-    if size > MAX_SIZE_MB:
-        logging.warning(f"Skipping {epg_url} ({size:.2f} MB > {MAX_SIZE_MB} MB)")
-        return None
+    for attempt in range(RESUME_RETRIES + 1):
+        try:
+            result = fetch_epg(epg_url, session, entry, headers, file_name_gz, tmp_path)
+        except (requests.RequestException, urllib3.exceptions.HTTPError) as e:
+            if attempt == RESUME_RETRIES:
+                raise
+            logging.warning(f"Download of {epg_url} interrupted ({e}), retrying")
+            continue
+        return result._replace(elapsed=time.perf_counter() - start)
 
-    logging.info(f"Downloading {epg_url} ({size:.2f} MB)")
-    response = requests.get(epg_url, stream=True)
-    if response.status_code != 200:
-        logging.warning(f"Failed to download {epg_url}")
-        return None
+def fetch_epg(epg_url, session, entry, headers, file_name_gz, tmp_path):
+    """One GET for download_epg, resuming from tmp_path when it holds a validated partial download."""
+    max_bytes = MAX_SIZE_MB * 1024 * 1024
+    offset, validator = read_partial(tmp_path, epg_url)
+    if offset:
+        headers = dict(headers, Range=f"bytes={offset}-")
+        headers["If-Range"] = validator
+
+    def skipped():
+        return DownloadResult(epg_url, None, 0, 0, 0, None)
+
+    with session.get(epg_url, stream=True, headers=headers, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT)) as response:
+        if entry and response.status_code == 304:
+            logging.info(f"Unchanged: {epg_url}")
+            remove_partial(tmp_path)
+            return DownloadResult(epg_url, file_name_gz, 0, 0, entry["size"], None)
 
-    with open(file_name_gz, "wb") as f:
-        shutil.copyfileobj(response.raw, f)
+        if offset and response.status_code == 206:
+            content_range = response.headers.get("Content-Range", "")
+            if not content_range.startswith(f"bytes {offset}-"):
+                remove_partial(tmp_path)
+                raise requests.RequestException(f"unexpected Content-Range '{content_range}'")
+            total = content_range.rpartition("/")[2]
+            size = int(total) / (1024 * 1024) if total.isdigit() else 0
+            logging.info(f"Resuming {epg_url} at {offset / (1024 * 1024):.2f} MB")
+        elif response.status_code == 200:
+            # Either a fresh download or the server ignored the range / the file changed upstream
+            offset = 0
+            size = int(response.headers.get("Content-Length", 0)) / (1024 * 1024)
+        elif offset:
+            # e.g. 416 after the file shrank upstream: drop the .part so the next run starts clean
+            # instead of sending the same Range forever, and count the guide as failed
+            remove_partial(tmp_path)
+            raise Exception(f"Failed to resume {epg_url} at {offset} bytes (status: {response.status_code})")
+        else:
+            logging.warning(f"Failed to download {epg_url}")
+            return skipped()
+
+        # Reject early when the server announces the size; the cap is enforced below regardless
+        if size > MAX_SIZE_MB:
+            logging.warning(f"Skipping {epg_url} ({size:.2f} MB > {MAX_SIZE_MB} MB)")
+            remove_partial(tmp_path)
+            return skipped()
+
+        logging.info(f"Downloading {epg_url} ({size:.2f} MB)")
+        sha256 = hashlib.sha256()
+        validator = GzipValidator()
+        received = 0
+        try:
+            if offset:
+                # Re-check the bytes we already have so the validator and hash cover the whole file
+                with open(tmp_path, "rb") as f:
+                    for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                        validator.feed(chunk)
+                        sha256.update(chunk)
+                received = offset
+            else:
+                remove_partial(tmp_path)
+                resume_from = resume_validator(response)
+                if resume_from:
+                    with open(tmp_path + ".json", "w", encoding="utf-8") as f:
+                        json.dump({"url": epg_url, "validator": resume_from}, f)
+
+            with open(tmp_path, "ab" if offset else "wb") as f:
+                for chunk in response.raw.stream(CHUNK_SIZE, decode_content=False):
+                    received += len(chunk)
+                    if received > max_bytes:
+                        raise OverflowError(f"more than {MAX_SIZE_MB} MB")
+                    validator.feed(chunk)
+                    sha256.update(chunk)
+                    f.write(chunk)
+            validator.finish()
+        except (OverflowError, ValueError, zlib.error) as e:
+            remove_partial(tmp_path)
+            logging.warning(f"Skipping {epg_url}: {e}")
+            return skipped()
+        except (requests.RequestException, urllib3.exceptions.HTTPError):
+            # Keep the .part file (and its validator) so the next attempt resumes it
+            raise
+        except BaseException:
+            remove_partial(tmp_path)
+            raise
+
+        os.replace(tmp_path, file_name_gz)
+        remove_partial(tmp_path)
+        meta = {
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "size": received,
+            "sha256": sha256.hexdigest(),
+        }
     logging.info(f"Saved to {file_name_gz}")
 
-    return file_name_gz
+    return DownloadResult(epg_url, file_name_gz, received - offset, 0, 0, meta)
+
+def download_all(links, session, manifest, max_workers=MAX_WORKERS):
+    """
+    Download links on a bounded thread pool. manifest is updated in place with every file that
+    was (re)downloaded. Returns (results, failed urls).
+    """
+    results = []
+    failed = []
+    with ThreadPoolExecutor(max_workers=max(max_workers, 1)) as executor:
+        futures = {executor.submit(download_epg, link, session, manifest.get(link)): link for link in links}
+        for future in as_completed(futures):
+            link = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                logging.error(f"Error downloading {link}: {e}")
+                failed.append(link)
+                continue
+            results.append(result)
+            if result.meta is not None:
+                manifest[link] = result.meta
+    return results, failed
+
+def log_summary(results, failed, elapsed):
+    """Log per-file latency and overall throughput."""
+    downloaded = [r for r in results if r.path and r.meta is not None]
+    unchanged = [r for r in results if r.path and r.meta is None]
+    total_bytes = sum(r.size for r in downloaded)
+    for r in sorted(downloaded, key=lambda r: r.elapsed, reverse=True):
+        logging.info(f"  {os.path.basename(r.url)}: {r.size / (1024 * 1024):.2f} MB in {r.elapsed:.2f}s")
+    latencies = sorted(r.elapsed for r in downloaded)
+    if latencies:
+        logging.info(
+            f"Per-file latency: min {latencies[0]:.2f}s, "
+            f"median {latencies[len(latencies) // 2]:.2f}s, max {latencies[-1]:.2f}s"
+        )
+    rate = total_bytes / elapsed if elapsed > 0 else 0
+    logging.info(
+        f"Downloaded {len(downloaded)} files, {total_bytes / (1024 * 1024):.2f} MB in {elapsed:.2f}s "
+        f"({rate / (1024 * 1024):.2f} MB/s); skipped {len(results) - len(downloaded) - len(unchanged)}, failed {len(failed)}"
+    )
+    logging.info(
+        f"Unchanged upstream: {len(unchanged)} files, "
+        f"{sum(r.saved for r in unchanged) / (1024 * 1024):.2f} MB not downloaded"
+    )
 
-def main():
+def main(base_url=BASE_URL, max_workers=MAX_WORKERS):
     try:
-        epg_links = get_epg_links()
-        for link in epg_links:
-            download_epg(link)
+        start = time.perf_counter()
+        manifest = load_manifest()
+        with create_session(max_workers) as session:
+            epg_links = get_epg_links(session, base_url)
+            results, failed = download_all(epg_links, session, manifest, max_workers)
+        save_manifest(manifest)
+        log_summary(results, failed, time.perf_counter() - start)
+        if failed:
+            raise Exception(f"{len(failed)} downloads failed")
         logging.info("✅ All eligible compressed EPG files downloaded successfully.")
         logging.info("You can access them via raw GitHub URLs, e.g.:")
         logging.info("https://raw.githubusercontent.com/ryandriscoll/LiveTv-English/main/epg/epg_ripper_US1.xml.gz")
@@ -59,4 +312,4 @@ def main():
         exit(1)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,180 @@
+import os
+import sys
+import json
+import glob
+import hashlib
+import logging
+import argparse
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+from epg_reader import iter_elements, channel_record
+
+# --- CONFIGURATION ---
+EPG_DIR = "./epg"
+INDEX_FILE = "epg_channel_index.json"
+GUIDE_PATTERN = "*.xml.gz"
+MAX_WORKERS = None  # worker processes; None uses every CPU
+
+# Bump whenever the stored layout or scan_guide() changes so old index files get rebuilt
+INDEX_FORMAT = 1
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def scan_guide(path):
+    """
+    Stream one XMLTV guide and return {channel id: [display names, icon, programme count]}.
+    Runs in a worker process; elements are cleared as soon as they are read.
+    """
+    channels = {}
+    programmes = Counter()
+    for _, elem in iter_elements(path):
+        if elem.tag == "programme":
+            programmes[elem.get("channel")] += 1
+        elif elem.tag == "channel":
+            record = channel_record(elem)
+            if record.id:
+                names = [name.strip() for name in record.display_names if name and name.strip()]
+                channels[record.id] = [names, record.icon, 0]
+    for channel_id, count in programmes.items():
+        if channel_id in channels:
+            channels[channel_id][2] = count
+    return channels
+
+
+def _read_index(index_path):
+    if not os.path.exists(index_path):
+        return None
+    try:
+        with open(index_path, "r", encoding="utf-8") as f:
+            index = json.load(f)
+    except Exception as e:
+        logging.warning(f"Failed to load guide index file: {e}")
+        return None
+    if not isinstance(index, dict) or index.get("format") != INDEX_FORMAT:
+        logging.info("Guide index format changed, rebuilding.")
+        return None
+    return index
+
+
+def save_index(index, index_path=INDEX_FILE):
+    """Write the index atomically so a crashed run never leaves a half-written file behind."""
+    tmp_path = index_path + ".tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(index, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, index_path)
+        logging.info(f"Saved guide index to {index_path}")
+    except Exception as e:
+        logging.warning(f"Failed to save guide index file: {e}")
+
+
+def update_index(epg_dir=EPG_DIR, index_path=INDEX_FILE, max_workers=MAX_WORKERS):
+    """
+    Bring the index up to date with the guides in epg_dir and return it.
+
+    A guide whose size and mtime are unchanged is trusted without reading it; otherwise its
+    sha256 is compared and only guides whose content really changed are parsed again, in
+    parallel worker processes. Guides that disappeared are dropped.
+    """
+    index = _read_index(index_path) or {"format": INDEX_FORMAT, "guides": {}}
+    old_guides = index["guides"]
+    guides = {}
+    to_scan = []
+
+    for path in sorted(glob.glob(os.path.join(epg_dir, GUIDE_PATTERN))):
+        name = os.path.basename(path)
+        stat = os.stat(path)
+        old = old_guides.get(name)
+        if old and old["size"] == stat.st_size and old["mtime_ns"] == stat.st_mtime_ns:
+            guides[name] = old
+            continue
+        sha256 = file_sha256(path)
+        if old and old["sha256"] == sha256:
+            # Same content, only the mtime moved (e.g. git checkout)
+            guides[name] = dict(old, mtime_ns=stat.st_mtime_ns)
+            continue
+        guides[name] = {"sha256": sha256, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "channels": {}}
+        to_scan.append(name)
+
+    removed = set(old_guides) - set(guides)
+    if to_scan:
+        logging.info(f"Scanning {len(to_scan)} of {len(guides)} guides...")
+        paths = [os.path.join(epg_dir, name) for name in to_scan]
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = {name: executor.submit(scan_guide, path) for name, path in zip(to_scan, paths)}
+            for name, future in futures.items():
+                try:
+                    channels = future.result()
+                except Exception as e:
+                    # Leave a broken guide out of the index; it is retried on the next run
+                    logging.error(f"Failed to index {name}: {e}")
+                    del guides[name]
+                    continue
+                guides[name]["channels"] = channels
+                logging.info(f"Indexed {name}: {len(channels)} channels")
+    else:
+        logging.info(f"All {len(guides)} guides unchanged.")
+
+    index["guides"] = guides
+    # mtime-only refreshes stay in memory so CI checkouts don't churn the committed index
+    if to_scan or removed:
+        save_index(index, index_path)
+    return index
+
+
+class GuideIndex:
+    """In-memory lookups over every indexed guide: by channel id and by display name."""
+
+    def __init__(self, index):
+        # channel id / lowercased display name -> [(guide file, channel id, names, icon, programmes)]
+        self.ids = defaultdict(list)
+        self.names = defaultdict(list)
+        # Two-letter country codes epgshare ids end with ("ESPN.br" -> "br")
+        self.countries = set()
+        for guide, info in index["guides"].items():
+            for channel_id, (names, icon, programmes) in info["channels"].items():
+                entry = (guide, channel_id, names, icon, programmes)
+                self.ids[channel_id].append(entry)
+                suffix = channel_id.rsplit(".", 1)[-1].lower() if "." in channel_id else ""
+                if len(suffix) == 2 and suffix.isalpha():
+                    self.countries.add(suffix)
+                for name in set(n.lower() for n in names):
+                    self.names[name].append(entry)
+
+    @classmethod
+    def load(cls, epg_dir=EPG_DIR, index_path=INDEX_FILE):
+        return cls(update_index(epg_dir, index_path))
+
+    def by_id(self, channel_id):
+        return self.ids.get(channel_id, [])
+
+    def by_name(self, name):
+        return self.names.get(name.strip().lower(), [])
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Index the channels of every guide in epg/.")
+    arg_parser.add_argument("queries", nargs="*", help="channel ids or display names to look up")
+    args = arg_parser.parse_args(argv)
+
+    guide_index = GuideIndex.load()
+    logging.info(f"{len(guide_index.ids)} channel ids, {len(guide_index.names)} display names indexed")
+    for query in args.queries:
+        matches = guide_index.by_id(query) or guide_index.by_name(query)
+        if not matches:
+            print(f"{query}: not found")
+        for guide, channel_id, names, icon, programmes in matches:
+            print(f"{query}: {channel_id} in {guide} ({programmes} programmes) {names} {icon or ''}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    sys.exit(main())
@@ -1,11 +1,23 @@
+import os
+import re
+import gzip
 import json
-import xml.etree.ElementTree as ET
-from datetime import datetime, timedelta
+import shutil
+import argparse
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+from epg_reader import parse_iso_time
 
 # ---- CONFIGURATION ----
 INPUT_FILE = "daddyliveSchedule.json"
 OUTPUT_FILE = "epg.xml"
-TIMEZONE = "-0700"  # Adjust if needed, e.g. "+0100" for UK BST, "-0700" for Phoenix
+SCHEDULE_TIMEZONE = "Europe/London"  # the schedule's "UK GMT" times follow the UK clock
+TIMEZONE = "-0700"  # Zone epg.xml is written in, e.g. "+0100", "UTC" or "America/Phoenix"
+WINDOW_PAST_HOURS = 6  # with --window: keep programmes that ended at most this long ago
+WINDOW_FUTURE_HOURS = 48  # ... and that start at most this far ahead
+
+DAY_RE = re.compile(r"(\d{1,2})(?:st|nd|rd|th)?\s+([A-Za-z]+)\s*(\d{4})")
 
 # ---- FUNCTIONS ----
 
@@ -13,15 +25,54 @@ def clean_channel_name(name: str) -> str:
     """Normalize channel name for XMLTV id (no spaces, lowercase)."""
     return name.strip().lower().replace(" ", "_").replace("/", "_")
 
-def build_programme(channel_id, event, time_str, day_str):
-    """Construct a programme entry for XMLTV."""
-    # Attempt to parse date and time
-    # Example: "Saturday 18th Oct2025 - Schedule Time UK GMT"
-    try:
-        # Extract the date from the day string
-        date_part = " ".join(day_str.split()[:3])  # "Saturday 18th Oct2025"
-        date_obj = datetime.strptime(date_part.replace("th", "").replace("st", "").replace("nd", "").replace("rd", ""), "%A %d %b%Y")
-    except Exception:
+def escape_text(text):
+    """Escape element text the same way ElementTree does."""
+    if "&" in text:
+        text = text.replace("&", "&amp;")
+    if "<" in text:
+        text = text.replace("<", "&lt;")
+    if ">" in text:
+        text = text.replace(">", "&gt;")
+    return text
+
+def escape_attrib(text):
+    """Escape an attribute value the same way ElementTree does."""
+    text = escape_text(text)
+    if "\"" in text:
+        text = text.replace("\"", "&quot;")
+    if "\r" in text:
+        text = text.replace("\r", "&#13;")
+    if "\n" in text:
+        text = text.replace("\n", "&#10;")
+    if "\t" in text:
+        text = text.replace("\t", "&#09;")
+    return text
+
+def parse_day(day_str):
+    """Parse a schedule day header once; every programme of that day reuses the result."""
+    # Examples: "Saturday 18th Oct2025 - Schedule Time UK GMT", "Wednesday 06th May 2026 - ..."
+    match = DAY_RE.search(day_str)
+    if not match:
+        return None
+    day, month, year = match.groups()
+    for month_format in ("%B", "%b"):
+        try:
+            return datetime.strptime(f"{day} {month} {year}", f"%d {month_format} %Y")
+        except ValueError:
+            continue
+    return None
+
+def parse_zone(spec):
+    """A tzinfo for "+0100"/"-0700" style offsets, "UTC" or an IANA name like "America/Phoenix"."""
+    if spec[:1] in "+-":
+        return datetime.strptime(spec, "%z").tzinfo
+    if spec.upper() in ("UTC", "GMT", "Z"):
+        return timezone.utc
+    return ZoneInfo(spec)
+
+def programme_start(time_str, date_obj, source_tz):
+    """Aware start time of an event: its HH:MM on the schedule day (today if the day is unknown)."""
+    if date_obj is None:
         date_obj = datetime.utcnow()
 
     # Parse HH:MM
@@ -30,58 +81,173 @@ def build_programme(channel_id, event, time_str, day_str):
     except Exception:
         hour, minute = (0, 0)
 
-    start_time = date_obj.replace(hour=hour, minute=minute)
-    end_time = start_time + timedelta(hours=1)  # default duration = 1h
+    return date_obj.replace(hour=hour, minute=minute, tzinfo=source_tz)
+
+def build_programme(channel_id, event, start_time, compact=False):
+    """
+    Serialize a programme entry for XMLTV, with its times written in start_time's own zone.
+    compact leaves out the "<event> on <channel>" desc.
+    """
+    # default duration = 1h, counted in UTC: aware datetime arithmetic is wall-clock time
+    end_time = (start_time.astimezone(timezone.utc) + timedelta(hours=1)).astimezone(start_time.tzinfo)
+
+    start_str = start_time.strftime("%Y%m%d%H%M%S %z")
+    end_str = end_time.strftime("%Y%m%d%H%M%S %z")
+
+    channel_attr = escape_attrib(channel_id)
+    title = f'<title lang="en">{escape_text(event)}</title>' if event else '<title lang="en" />'
+    desc = "" if compact else f'<desc lang="en">{escape_text(f"{event} on {channel_id}")}</desc>'
+
+    return (
+        f'<programme start="{escape_attrib(start_str)}" stop="{escape_attrib(end_str)}" channel="{channel_attr}">'
+        f'{title}{desc}</programme>'
+    )
+
+def build_channel(channel_id, channel_name):
+    """Serialize a channel entry for XMLTV."""
+    display_name = f"<display-name>{escape_text(channel_name)}</display-name>" if channel_name else "<display-name />"
+    return f'<channel id="{escape_attrib(channel_id)}">{display_name}</channel>'
+
+def parse_events(data, source_tz=None):
+    """
+    Flatten the schedule into (channel id, channel name, event, aware start) tuples in document
+    order. This is the only pass over the JSON; every output zone is written from the result.
+    """
+    source_tz = source_tz or parse_zone(SCHEDULE_TIMEZONE)
+    parsed = []
 
-    start_str = start_time.strftime("%Y%m%d%H%M%S") + " " + TIMEZONE
-    end_str = end_time.strftime("%Y%m%d%H%M%S") + " " + TIMEZONE
+    for day, categories in data.items():
+        date_obj = parse_day(day)
 
-    programme = ET.Element("programme", start=start_str, stop=end_str, channel=channel_id)
+        for category, events in categories.items():
+            for event_item in events:
+                event_name = event_item.get("event")
+                start_time = programme_start(event_item.get("time", "00:00"), date_obj, source_tz)
 
-    title = ET.SubElement(programme, "title", lang="en")
-    title.text = event
+                for ch in event_item.get("channels", []):
+                    ch_name = ch.get("channel_name")
+                    parsed.append((clean_channel_name(ch_name), ch_name, event_name, start_time))
 
-    desc = ET.SubElement(programme, "desc", lang="en")
-    desc.text = f"{event} on {channel_id}"
+    return parsed
 
-    return programme
+def stream_events(events, out, tz=None, window=None, compact=False):
+    """
+    Write the XMLTV document for parsed events to the text stream out, element by element,
+    with every time shifted into tz (TIMEZONE by default).
 
-# ---- MAIN ----
+    window is an optional (start, stop) pair of aware datetimes: programmes that end before
+    start or begin after stop are left out. Every channel is still written so playlist
+    matching sees the same ids. compact drops the redundant descriptions.
+    Returns the number of programmes written.
+    """
+    tz = tz or parse_zone(TIMEZONE)
+    channels_seen = set()
+    written = 0
 
-def main():
-    with open(INPUT_FILE, "r", encoding="utf-8") as f:
-        data = json.load(f)
+    out.write("<?xml version='1.0' encoding='utf-8'?>\n<tv>")
 
-    tv = ET.Element("tv")
+    for ch_id, ch_name, event_name, start_time in events:
+        if ch_id not in channels_seen:
+            # Add a <channel> entry once per channel
+            out.write(build_channel(ch_id, ch_name))
+            channels_seen.add(ch_id)
 
-    channels_seen = set()
+        if window is not None and (start_time + timedelta(hours=1) < window[0] or start_time > window[1]):
+            continue
 
-    for day, categories in data.items():
-        for category, events in categories.items():
-            for event_item in events:
-                event_name = event_item.get("event")
-                time_str = event_item.get("time", "00:00")
+        # Add the <programme> entry
+        out.write(build_programme(ch_id, event_name, start_time.astimezone(tz), compact))
+        written += 1
 
-                for ch in event_item.get("channels", []):
-                    ch_name = ch.get("channel_name")
-                    ch_id = clean_channel_name(ch_name)
+    out.write("</tv>")
+    return written
+
+def stream_epg(data, out, window=None, compact=False, tz=None):
+    """Write the XMLTV document for the schedule data to the text stream out."""
+    return stream_events(parse_events(data), out, tz, window, compact)
 
-                    if ch_id not in channels_seen:
-                        # Add a <channel> entry once per channel
-                        channel_el = ET.Element("channel", id=ch_id)
-                        display_name = ET.SubElement(channel_el, "display-name")
-                        display_name.text = ch_name
-                        tv.append(channel_el)
-                        channels_seen.add(ch_id)
+def write_epg(events, output_path, tz=None, window=None, compact=False):
+    """
+    Stream <channel> and <programme> elements straight to output_path as they are produced,
+    so memory use doesn't grow with the size of the schedule.
+    """
+    with open(output_path, "w", encoding="utf-8", errors="xmlcharrefreplace") as out:
+        return stream_events(events, out, tz, window, compact)
 
-                    # Add the <programme> entry
-                    programme_el = build_programme(ch_id, event_name, time_str, day)
-                    tv.append(programme_el)
+def zone_output(output_path, spec):
+    """epg.xml + "+0100" -> epg_UTC+0100.xml, + "America/Phoenix" -> epg_America_Phoenix.xml."""
+    stem, ext = os.path.splitext(output_path)
+    label = f"UTC{spec}" if spec[:1] in "+-" else spec.replace("/", "_")
+    return f"{stem}_{label}{ext}"
 
-    tree = ET.ElementTree(tv)
-    tree.write(OUTPUT_FILE, encoding="utf-8", xml_declaration=True)
+def gzip_file(path):
+    """Write path + ".gz" next to path and return its name."""
+    gz_path = path + ".gz"
+    with open(path, "rb") as src, gzip.open(gz_path + ".tmp", "wb", compresslevel=9) as dst:
+        shutil.copyfileobj(src, dst)
+    os.replace(gz_path + ".tmp", gz_path)
+    return gz_path
+
+class ByteCounter:
+    """Text sink that only counts the UTF-8 bytes written to it."""
+
+    def __init__(self):
+        self.size = 0
+
+    def write(self, text):
+        self.size += len(text.encode("utf-8", "xmlcharrefreplace"))
+
+# ---- MAIN ----
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Convert the DaddyLive schedule JSON to XMLTV.")
+    arg_parser.add_argument("--input", default=INPUT_FILE)
+    arg_parser.add_argument("--output", default=OUTPUT_FILE)
+    arg_parser.add_argument("--timezones",
+                            help="comma-separated zones (e.g. -0700,+0100,UTC,America/New_York): write one "
+                                 "<output>_<zone> file per zone instead of a single file in TIMEZONE")
+    arg_parser.add_argument("--window", action="store_true",
+                            help="only keep programmes within --past-hours/--future-hours of now")
+    arg_parser.add_argument("--past-hours", type=float, default=WINDOW_PAST_HOURS)
+    arg_parser.add_argument("--future-hours", type=float, default=WINDOW_FUTURE_HOURS)
+    arg_parser.add_argument("--now", type=parse_iso_time, default=None,
+                            help="centre of the window (ISO 8601, UTC if no offset); defaults to now")
+    arg_parser.add_argument("--compact", action="store_true", help="leave out the redundant <desc> elements")
+    arg_parser.add_argument("--gzip", action="store_true", help="also write <output>.gz")
+    arg_parser.add_argument("--report", action="store_true", help="print the size saved against a full conversion")
+    args = arg_parser.parse_args(argv)
+
+    with open(args.input, "r", encoding="utf-8") as f:
+        data = json.load(f)
 
-    print(f"✅ EPG file generated successfully: {OUTPUT_FILE}")
+    window = None
+    if args.window:
+        now = args.now or datetime.now(timezone.utc)
+        window = (now - timedelta(hours=args.past_hours), now + timedelta(hours=args.future_hours))
+
+    events = parse_events(data)
+    if args.timezones:
+        targets = [(zone_output(args.output, spec), parse_zone(spec))
+                   for spec in (z.strip() for z in args.timezones.split(",")) if spec]
+    else:
+        targets = [(args.output, parse_zone(TIMEZONE))]
+
+    outputs = []
+    for output_path, tz in targets:
+        programmes = write_epg(events, output_path, tz, window, args.compact)
+        print(f"✅ EPG file generated successfully: {output_path} ({programmes} programmes)")
+        outputs.append(output_path)
+        if args.gzip:
+            outputs.append(gzip_file(output_path))
+            print(f"✅ Compressed copy written: {outputs[-1]}")
+
+    if args.report:
+        full = ByteCounter()
+        full_programmes = stream_events(events, full)
+        print(f"Full conversion: {full.size:,} bytes, {full_programmes} programmes")
+        for path in outputs:
+            size = os.path.getsize(path)
+            print(f"{path}: {size:,} bytes ({100 * (1 - size / full.size):.1f}% smaller)")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,147 @@
+import os
+import re
+import json
+import hashlib
+import logging
+
+# --- CONFIGURATION ---
+LOGO_DIR = "./tv"
+INDEX_FILE = "logo_index.json"
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".webp")
+
+# Bump whenever the stored layout or normalize_name() changes so old index files get rebuilt
+INDEX_FORMAT = 1
+
+
+def normalize_name(name: str) -> str:
+    name = name.lower()
+    name = re.sub(r'[\s_\-]+', '', name)
+    name = name.replace('&', 'and').replace('+', 'plus')
+    name = name.replace('hd', '').replace('fhd', '').replace('uhd', '')
+    name = re.sub(r'\b(tv|channel|network|sports?|extra|international|premium|the)\b', '', name)
+    return name.strip()
+
+
+def scan_tree(base_dir=LOGO_DIR):
+    """
+    Walk base_dir once and return [relative dir, mtime_ns, [image files]] per directory, in walk order.
+    Only names are collected here; nothing is normalized.
+    """
+    dirs = []
+    for root, _, files in os.walk(base_dir):
+        rel_dir = os.path.relpath(root, base_dir).replace("\\", "/")
+        images = [f for f in files if f.lower().endswith(IMAGE_EXTENSIONS)]
+        dirs.append([rel_dir, os.stat(root).st_mtime_ns, images])
+    return dirs
+
+
+def tree_hash(dirs):
+    """Stable fingerprint of the directory listing (independent of mtimes and walk order)."""
+    digest = hashlib.sha1()
+    for rel_dir, _, files in sorted(dirs, key=lambda d: d[0]):
+        digest.update(rel_dir.encode("utf-8"))
+        for f in sorted(files):
+            digest.update(b"\0" + f.encode("utf-8"))
+        digest.update(b"\n")
+    return digest.hexdigest()
+
+
+def build_index(base_dir=LOGO_DIR, dirs=None):
+    """Build the logo index for base_dir, normalizing every image name exactly once."""
+    if dirs is None:
+        dirs = scan_tree(base_dir)
+    index = {
+        "format": INDEX_FORMAT,
+        "base_dir": base_dir,
+        "tree_hash": tree_hash(dirs),
+        "dirs": [
+            [rel_dir, mtime_ns, [[f, normalize_name(os.path.splitext(f)[0])] for f in files]]
+            for rel_dir, mtime_ns, files in dirs
+        ],
+    }
+    logging.info(f"Built logo index for {base_dir}: {sum(len(d[2]) for d in dirs)} logos in {len(dirs)} folders")
+    return index
+
+
+def save_index(index, index_path=INDEX_FILE):
+    """Write the index atomically so a crashed run never leaves a half-written file behind."""
+    tmp_path = index_path + ".tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(index, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, index_path)
+        logging.info(f"Saved logo index to {index_path}")
+    except Exception as e:
+        logging.warning(f"Failed to save logo index file: {e}")
+
+
+def _read_index(index_path):
+    if not os.path.exists(index_path):
+        return None
+    try:
+        with open(index_path, "r", encoding="utf-8") as f:
+            index = json.load(f)
+    except Exception as e:
+        logging.warning(f"Failed to load logo index file: {e}")
+        return None
+    if not isinstance(index, dict) or index.get("format") != INDEX_FORMAT:
+        logging.info("Logo index format changed, rebuilding.")
+        return None
+    return index
+
+
+def _mtimes_match(index, base_dir):
+    for rel_dir, mtime_ns, _ in index["dirs"]:
+        try:
+            if os.stat(os.path.join(base_dir, rel_dir)).st_mtime_ns != mtime_ns:
+                return False
+        except OSError:
+            return False
+    return True
+
+
+def load_index(base_dir=LOGO_DIR, index_path=INDEX_FILE):
+    """
+    Return the logo index for base_dir, reusing index_path whenever the tree is unchanged.
+
+    1. If every indexed folder still has its recorded mtime, the file is used as-is.
+    2. Otherwise the tree is listed (no normalization) and compared by tree_hash; a fresh
+       checkout with new mtimes but identical files keeps the stored index.
+    3. Only a real change to the set of logo files triggers a rebuild and rewrite.
+    """
+    index = _read_index(index_path)
+    if index is not None and index.get("base_dir") == base_dir:
+        if _mtimes_match(index, base_dir):
+            logging.info(f"Loaded logo index from {index_path} (tree unchanged)")
+            return index
+
+        dirs = scan_tree(base_dir)
+        if tree_hash(dirs) == index["tree_hash"]:
+            # Same files, only the mtimes moved (e.g. git checkout). Refresh them in memory
+            # but don't rewrite the file, so CI runs don't churn the committed index.
+            stored = {d[0]: d for d in index["dirs"]}
+            for rel_dir, mtime_ns, _ in dirs:
+                stored[rel_dir][1] = mtime_ns
+            logging.info(f"Loaded logo index from {index_path} (listing unchanged)")
+            return index
+        logging.info("Logo tree changed, rebuilding logo index.")
+    else:
+        dirs = None
+
+    index = build_index(base_dir, dirs)
+    save_index(index, index_path)
+    return index
+
+
+def iter_logos(index):
+    """Yield (path, filename, normalized name) for every indexed logo, in walk order."""
+    base_dir = index["base_dir"]
+    for rel_dir, _, files in index["dirs"]:
+        root = base_dir if rel_dir == "." else os.path.join(base_dir, rel_dir)
+        for f, norm in files:
+            yield os.path.join(root, f), f, norm
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    save_index(build_index(LOGO_DIR), INDEX_FILE)
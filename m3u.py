@@ -4,19 +4,15 @@ import re
 import json
 import sys
 import time
-import urllib.parse
+import argparse
 import urllib3
 import concurrent.futures
 from datetime import datetime, timedelta
-from base64 import b64decode, b64encode
-from binascii import a2b_hex
 
-try:
-    from bs4 import BeautifulSoup
-    from dateutil import parser
-    from playwright.sync_api import sync_playwright
-except ImportError:
-    print("ERROR: Missing required libraries. Please run: pip install requests beautifulsoup4 python-dateutil playwright", file=sys.stderr)
+from playlist import Entry, Playlist
+
+# BeautifulSoup, dateutil and Playwright are imported by the sources that use them, so a
+# vavoo or sportsonline refresh doesn't pay for (or need) the scraping stack.
 
  # Disable security warnings for requests without SSL verification
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
@@ -29,113 +25,386 @@ def search_m3u8_in_sites(channel_id, is_tennis=False, session=None):
     """Directly generates the dlhd.dad URL for the provided channel_id."""
     return f"https://dlhd.dad/watch.php?id={channel_id}"
 
-def dlhd():
+def dedupe_names(names):
+    """Give repeated names a counter: the first keeps its name, the next ones get " (2)", " (3)", ..."""
+    name_counts = {}
+    for name in names:
+        name_counts[name] = name_counts.get(name, 0) + 1
+
+    final_names = []
+    name_counter = {}
+    for name in names:
+        if name_counts[name] > 1:
+            if name not in name_counter:
+                # First occurrence of a duplicate, keep the original name
+                name_counter[name] = 1
+                final_names.append(name)
+            else:
+                # Subsequent occurrences, add counter
+                name_counter[name] += 1
+                final_names.append(f"{name} ({name_counter[name]})")
+        else:
+            final_names.append(name)
+    return final_names
+
+
+class Source:
     """
-    Extracts 24/7 channels and live events from DaddyLive and saves them in a single M3U file.
-    Automatically removes duplicate channels.
+    One playlist source. fetch() does the network work and returns what was found (a Playlist,
+    or None when there is nothing to write); save() writes it to self.path. A source starts
+    only after every source named in requires has finished. packages lists the pip packages
+    its lazy imports need, for the error message when one is missing.
     """
-    print("Running dlhd...")
+    name = ""
+    output_file = ""
+    requires = ()
+    packages = ()
+
+    def __init__(self, out_dir="."):
+        self.out_dir = out_dir
+        self.path = os.path.join(out_dir, self.output_file)
+
+    def fetch(self):
+        raise NotImplementedError
+
+    def save(self, result):
+        result.write(self.path)
+
+
+class ScheduleSource(Source):
+    """Scrapes the DaddyLive schedule with Playwright into daddyliveSchedule.json."""
+    name = "schedule"
+    output_file = "daddyliveSchedule.json"
+    packages = ("beautifulsoup4", "playwright")
+    url = "https://dlhd.dad/"
+    ready_selector = ".schedule__day"
+    ready_timeout_ms = 30000  # per attempt; the page usually has its schedule within a few seconds
+    max_attempts = 3
+    static_timeout = 15  # seconds for the plain HTTP fetch tried before starting a browser
+    headers = {
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/132.0.0.0 Safari/537.36"
+    }
+    # Nothing of these is needed for the schedule markup, so don't download it
+    blocked_resource_types = {"image", "font", "media"}
+    blocked_hosts = ("doubleclick.net", "googlesyndication.com", "googleadservices.com", "google-analytics.com",
+                     "googletagmanager.com", "adservice.google", "popads.net", "propellerads", "adsterra",
+                     "histats.com", "disqus.com")
+
+    @staticmethod
+    def html_to_json(html_content):
+        # lxml when installed, BeautifulSoup otherwise; imported here to keep vavoo-only runs light
+        import schedule_html
+        return schedule_html.html_to_json(html_content)
+
+    @staticmethod
+    def fix_month(data):
+        """Put the current month into day keys such as "Saturday 18th 2025" that lack one."""
+        current_month = datetime.now().strftime("%B")
+
+        for date in list(data.keys()):
+            match = re.match(r"(\w+\s\d+)(st|nd|rd|th)\s(\d{4})", date)
+            if match:
+                day_part = match.group(1)
+                suffix = match.group(2)
+                year_part = match.group(3)
+                new_date = f"{day_part}{suffix} {current_month} {year_part}"
+                data[new_date] = data.pop(date)
+        return data
+
+    def block_route(self, route):
+        """Abort images, fonts, media and ad/tracker requests; let everything else through."""
+        request = route.request
+        if request.resource_type in self.blocked_resource_types or any(
+            host in request.url for host in self.blocked_hosts
+        ):
+            route.abort()
+        else:
+            route.continue_()
+
+    def extract_schedule_container(self):
+        """
+        The schedule__day blocks of the page as HTML, or None if every attempt failed.
+
+        Each attempt returns as soon as the first schedule__day element exists instead of
+        sleeping a fixed time; one browser context (and its route blocking) serves every retry.
+        """
+        from playwright.sync_api import sync_playwright
+
+        print(f"Accessing page {self.url} to extract the schedule container...")
+
+        with sync_playwright() as p:
+            browser = p.chromium.launch(headless=True)
+            try:
+                context = browser.new_context(
+                    user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) Chrome/120.0.0.0 Safari/537.36"
+                )
+                context.route("**/*", self.block_route)
+                page = context.new_page()
+
+                for attempt in range(1, self.max_attempts + 1):
+                    start = time.perf_counter()
+                    try:
+                        print(f"Attempt {attempt} of {self.max_attempts}...")
+                        if page.is_closed():
+                            page = context.new_page()
+                        page.goto(self.url, wait_until="domcontentloaded", timeout=self.ready_timeout_ms)
+                        page.wait_for_selector(self.ready_selector, state="attached", timeout=self.ready_timeout_ms)
+
+                        schedule_content = page.evaluate("""(selector) => {
+                            const days = document.querySelectorAll(selector);
+                            return Array.from(days, day => day.outerHTML).join('');
+                        }""", self.ready_selector)
+                        print(f"Attempt {attempt} took {time.perf_counter() - start:.2f}s")
+
+                        if schedule_content:
+                            return schedule_content
+                        print("WARNING: Page content not found or empty!")
+
+                    except Exception as e:
+                        print(f"ERROR in attempt {attempt} after {time.perf_counter() - start:.2f}s: {str(e)}")
+                        if attempt < self.max_attempts:
+                            print(f"Retrying... (attempt {attempt + 1} of {self.max_attempts})")
+                print("All attempts failed!")
+                return None
+            finally:
+                browser.close()
+
+    def fetch_static(self):
+        """
+        The schedule from the page's static HTML, or None when it has no schedule__day blocks
+        (rendered by scripts, or a challenge page) or can't be fetched.
+        """
+        try:
+            with requests.Session() as session:
+                response = session.get(self.url, headers=self.headers, timeout=self.static_timeout, verify=False)
+                response.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            print(f"Plain HTTP fetch of {self.url} failed: {e}")
+            return None
+        if "schedule__day" not in response.text:
+            return None
+        return self.html_to_json(response.text) or None
+
+    def fetch(self):
+        start = time.perf_counter()
+        data = self.fetch_static()
+        if data is not None:
+            print(f"Schedule path: plain HTTP, no browser needed ({time.perf_counter() - start:.2f}s)")
+        else:
+            print("Schedule path: Playwright (static HTML has no schedule__day blocks)")
+            schedule_content = self.extract_schedule_container()
+            if schedule_content is None:
+                raise RuntimeError(f"could not load the schedule from {self.url}")
+            print("Converting main schedule HTML to JSON format...")
+            data = self.html_to_json(schedule_content)
+        return self.fix_month(data)
+
+    def save(self, result):
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=4)
+        print(f"JSON data saved in {self.path}")
+
+
+class VavooSource(Source):
+    """Every channel of the vavoo catalog, grouped by country."""
+    name = "vavoo"
+    output_file = "vavoo.m3u"
+
+    @staticmethod
+    def getAuthSignature():
+        headers = {
+            "user-agent": "okhttp/4.11.0",
+            "accept": "application/json",
+            "content-type": "application/json; charset=utf-8",
+            "content-length": "1106",
+            "accept-encoding": "gzip"
+        }
+        data = {
+            "token": "tosFwQCJMS8qrW_AjLoHPQ41646J5dRNha6ZWHnijoYQQQoADQoXYSo7ki7O5-CsgN4CH0uRk6EEoJ0728ar9scCRQW3ZkbfrPfeCXW2VgopSW2FWDqPOoVYIuVPAOnXCZ5g",
+            "reason": "app-blur",
+            "locale": "de",
+            "theme": "dark",
+            "metadata": {
+                "device": {
+                    "type": "Handset",
+                    "os": "Android",
+                    "osVersion": "10",
+                    "model": "Pixel 4",
+                    "brand": "Google"
+                }
+            }
+        }
+        resp = requests.post("https://vavoo.to/mediahubmx-signature.json", json=data, headers=headers, timeout=10)
+        return resp.json().get("signature")
+
+    @staticmethod
+    def vavoo_groups():
+        # You can add more groups for more channels
+        return [""]
+
+    @staticmethod
+    def clean_channel_name(name):
+        """Removes .a, .b, .c suffixes from the channel name"""
+        # Removes .a, .b, .c at the end of the name (with or without spaces before)
+        cleaned_name = re.sub(r'\s*\.(a|b|c|s|d|e|f|g|h|i|j|k|l|m|n|o|p|q|r|t|u|v|w|x|y|z)\s*$', '', name, flags=re.IGNORECASE)
+        return cleaned_name.strip()
+
+    def get_channels(self):
+        signature = self.getAuthSignature()
+        headers = {
+            "user-agent": "okhttp/4.11.0",
+            "accept": "application/json",
+            "content-type": "application/json; charset=utf-8",
+            "accept-encoding": "gzip",
+            "mediahubmx-signature": signature
+        }
+        all_channels = []
+        for group in self.vavoo_groups():
+            cursor = 0
+            while True:
+                data = {
+                    "language": "de",
+                    "region": "AT",
+                    "catalogId": "iptv",
+                    "id": "iptv",
+                    "adult": False,
+                    "search": "",
+                    "sort": "name",
+                    "filter": {"group": group},
+                    "cursor": cursor,
+                    "clientVersion": "3.0.2"
+                }
+                resp = requests.post("https://vavoo.to/mediahubmx-catalog.json", json=data, headers=headers, timeout=10)
+                r = resp.json()
+                items = r.get("items", [])
+                all_channels.extend(items)
+                cursor = r.get("nextCursor")
+                if not cursor:
+                    break
+        return all_channels
+
+    def build_playlist(self, channels):
+        # 1. Collect all channels into a flat list
+        all_channels_flat = []
+        for ch in channels:
+            original_name = ch.get("name", "NoName")
+            name = self.clean_channel_name(original_name)
+            url = ch.get("url", "")
+            category = ch.get("group", "General")
+            if url:
+                all_channels_flat.append({'name': name, 'url': url, 'category': category})
+
+        # 2. Rename duplicates
+        names = dedupe_names([ch_data['name'] for ch_data in all_channels_flat])
+
+        # 3. Group channels by category
+        channels_by_category = {}
+        for ch_data, name in zip(all_channels_flat, names):
+            channels_by_category.setdefault(ch_data['category'], []).append((name, ch_data['url']))
 
-    JSON_FILE = "daddyliveSchedule.json"
-    OUTPUT_FILE = "dlhd.m3u"
-    HEADERS = {
+        # 4. One "# CATEGORY" section per category, channels sorted by name
+        playlist = Playlist()
+        for category in sorted(channels_by_category.keys()):
+            channel_list = sorted(channels_by_category[category], key=lambda x: x[0].lower())
+            for i, (name, url) in enumerate(channel_list):
+                leading = [f"\n# {category.upper()}\n"] if i == 0 else []
+                playlist.entries.append(Entry(name, url, {"group-title": f"{category} VAVOO"}, leading=leading))
+
+        print(f"Channels organized in {len(channels_by_category)} categories:")
+        for category, channel_list in channels_by_category.items():
+            print(f"  - {category}: {len(channel_list)} channels")
+        return playlist
+
+    def fetch(self):
+        channels = self.get_channels()
+        print(f"Found {len(channels)} channels. Creating M3U playlist with proxy links...")
+        return self.build_playlist(channels)
+
+    def save(self, result):
+        result.write(self.path)
+        print(f"M3U playlist saved in: {self.path}")
+
+
+class DlhdSource(Source):
+    """
+    DaddyLive 24/7 channels and today's live events (from the schedule JSON) in a single
+    playlist. Automatically removes duplicate channels.
+    """
+    name = "dlhd"
+    output_file = "dlhd.m3u"
+    requires = ("schedule",)
+    packages = ("beautifulsoup4", "python-dateutil")
+    html_url = "https://dlhd.dad/24-7-channels.php"
+    headers = {
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/132.0.0.0 Safari/537.36"
     }
 
-    # ========== SUPPORT FUNCTIONS ==========
+    @staticmethod
     def clean_category_name(name):
         return re.sub(r'<[^>]+>', '', name).strip()
 
-    def clean_tvg_id(tvg_id):
-        cleaned = re.sub(r'[^a-zA-Z0-9À-ÿ]', '', tvg_id)
-        return cleaned.lower()
+    @property
+    def json_file(self):
+        return os.path.join(self.out_dir, ScheduleSource.output_file)
 
-    # ========== EXTRACTION OF 24/7 CHANNELS ==========
-    print("Extracting 24/7 channels from HTML page...")
-    html_url = "https://dlhd.dad/24-7-channels.php"
-    session = requests.Session()
+    def channels_247(self, session):
+        import schedule_html
 
-    try:
-        response = requests.get(html_url, headers=HEADERS, timeout=15, verify=False)
-        response.raise_for_status()
-        
-        # Parse HTML with BeautifulSoup
-        soup = BeautifulSoup(response.text, 'html.parser')
-        cards = soup.find_all('a', class_='card')
-        
-        print(f"Found {len(cards)} channels in HTML page")
- 
-        channels_247 = []
- 
-        for card in cards:
-            # Extract channel name
-            title_div = card.find('div', class_='card__title')
-            if not title_div:
-                continue
-            
-            name = title_div.text.strip()
-            
-            # Extract channel ID from href
-            href = card.get('href', '')
-            if not ('id=' in href):
-                continue
-            
-            channel_id = href.split('id=')[1].split('&')[0]
-            
-            if not name or not channel_id:
-                continue
+        print("Extracting 24/7 channels from HTML page...")
+        try:
+            response = requests.get(self.html_url, headers=self.headers, timeout=15, verify=False)
+            response.raise_for_status()
 
-            # Apply corrections as before
-            if name == "Sky Calcio 7 (257) Italy":
-                name = "DAZN"
-            if channel_id == "853":
-                name = "Canale 5 Italy"
-            
-            # Search for .m3u8 stream
-            stream_url = search_m3u8_in_sites(channel_id, is_tennis="tennis" in name.lower(), session=session)
-            
-            if stream_url: # The function now always returns a URL
-                channels_247.append((name, stream_url))
-
-        # Count occurrences of each channel name
-        name_counts = {}
-        for name, _ in channels_247:
-            name_counts[name] = name_counts.get(name, 0) + 1
- 
-        # Add a counter to duplicate names
-        final_channels = []
-        name_counter = {}
- 
-        for name, stream_url in channels_247:
-            if name_counts[name] > 1:
-                if name not in name_counter:
-                    # First occurrence of a duplicate, keep the original name
-                    name_counter[name] = 1
-                    final_channels.append((name, stream_url))
-                else:
-                    # Subsequent occurrences, add counter
-                    name_counter[name] += 1
-                    new_name = f"{name} ({name_counter[name]})"
-                    final_channels.append((new_name, stream_url))
-            else:
-                final_channels.append((name, stream_url))
+            # (title, href) of every channel card, parsed with lxml when installed
+            cards = schedule_html.channel_cards(response.text)
+
+            print(f"Found {len(cards)} channels in HTML page")
+
+            channels_247 = []
+
+            for name, href in cards:
+                # Extract channel ID from href
+                if not ('id=' in href):
+                    continue
+
+                channel_id = href.split('id=')[1].split('&')[0]
+
+                if not name or not channel_id:
+                    continue
 
-        print(f"Found {len(channels_247)} 24/7 channels")
-        channels_247 = final_channels
-    except Exception as e:
-        print(f"Error extracting 24/7 channels: {e}")
-        channels_247 = []
+                # Apply corrections as before
+                if name == "Sky Calcio 7 (257) Italy":
+                    name = "DAZN"
+                if channel_id == "853":
+                    name = "Canale 5 Italy"
 
-    # ========== EXTRACTION OF LIVE EVENTS ==========
-    print("Extracting live events...")
-    live_events = []
+                # Search for .m3u8 stream
+                stream_url = search_m3u8_in_sites(channel_id, is_tennis="tennis" in name.lower(), session=session)
 
-    if os.path.exists(JSON_FILE):
+                if stream_url: # The function now always returns a URL
+                    channels_247.append((name, stream_url))
+
+            print(f"Found {len(channels_247)} 24/7 channels")
+            names = dedupe_names([name for name, _ in channels_247])
+            return [(name, stream_url) for name, (_, stream_url) in zip(names, channels_247)]
+        except Exception as e:
+            print(f"Error extracting 24/7 channels: {e}")
+            return []
+
+    def live_events(self, session):
+        from dateutil import parser
+
+        print("Extracting live events...")
+        if not os.path.exists(self.json_file):
+            print(f"File {self.json_file} not found, live events skipped")
+            return []
+
+        live_events = []
         try:
             now = datetime.now()
             yesterday_date = (now - timedelta(days=1)).date()
 
-            with open(JSON_FILE, "r", encoding="utf-8") as f:
+            with open(self.json_file, "r", encoding="utf-8") as f:
                 data = json.load(f)
 
             categorized_channels = {}
@@ -148,22 +417,17 @@ def dlhd():
                     print(f"Error parsing date '{date_part}': {e}")
                     continue
 
-                process_this_date = False
                 is_yesterday_early_morning_event_check = False
 
                 if date_obj == now.date():
-                    process_this_date = True
+                    pass
                 elif date_obj == yesterday_date:
-                    process_this_date = True
                     is_yesterday_early_morning_event_check = True
                 else:
                     continue
 
-                if not process_this_date:
-                    continue
-
                 for category_raw, event_items in sections.items():
-                    category = clean_category_name(category_raw)
+                    category = self.clean_category_name(category_raw)
                     if category.lower() == "tv shows":
                         continue
                     if category not in categorized_channels:
@@ -207,342 +471,57 @@ def dlhd():
             # Converti in lista per il file M3U
             for category, channels in categorized_channels.items():
                 for ch in channels:
-                    try: 
+                    try:
                         # Search first for .m3u8 stream
-                        stream = search_m3u8_in_sites(ch["channel_id"], is_tennis="tennis" in ch["channel_name"].lower(), session=session)                        
+                        stream = search_m3u8_in_sites(ch["channel_id"], is_tennis="tennis" in ch["channel_name"].lower(), session=session)
                         if stream:
                             live_events.append((f"{category} | {ch['tvg_name']}", stream))
                     except Exception as e:
                         print(f"Error on {ch['tvg_name']}: {e}")
 
             print(f"Found {len(live_events)} live events")
+            return live_events
 
         except Exception as e:
             print(f"Error extracting live events: {e}")
-            live_events = []
-    else:
-        print(f"File {JSON_FILE} not found, live events skipped")
+            return []
 
-    # ========== GENERATION OF UNIFIED M3U FILE ==========
-    print("Generating unified M3U file...")
+    def fetch(self):
+        session = requests.Session()
+        channels_247 = self.channels_247(session)
+        live_events = self.live_events(session)
 
-    with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-        f.write("#EXTM3U\n\n")
+        # Blank line after the header and after every entry
+        playlist = Playlist(trailer=["\n"])
 
         # Add live events if present
         if live_events:
-            f.write(f'#EXTINF:-1 group-title="Live Events",DADDYLIVE\n')
-            f.write("https://example.com.m3u8\n\n")
-
+            playlist.entries.append(Entry("DADDYLIVE", "https://example.com.m3u8", {"group-title": "Live Events"}, leading=["\n"]))
             for name, url in live_events:
-                f.write(f'#EXTINF:-1 group-title="Live Events",{name}\n')
-                f.write(f'{url}\n\n')
+                playlist.entries.append(Entry(name, url, {"group-title": "Live Events"}, leading=["\n"]))
 
         # Add 24/7 channels
-        if channels_247:
-            for name, url in channels_247:
-                f.write(f'#EXTINF:-1 group-title="DLHD 24/7",{name}\n')
-                f.write(f'{url}\n\n')
-
-    total_channels = len(channels_247) + len(live_events)
-    print(f"Created file {OUTPUT_FILE} with {total_channels} total channels:")
-    print(f"  - {len(channels_247)} 24/7 channels")
-    print(f"  - {len(live_events)} live events")
-
- # Function for the fourth script (schedule_extractor.py)
-def schedule_extractor():
-    # Code for the fourth script here
-    # Add the code of your "schedule_extractor.py" script in this function.
-    print("Running schedule_extractor.py...")
+        for name, url in channels_247:
+            playlist.entries.append(Entry(name, url, {"group-title": "DLHD 24/7"}, leading=["\n"]))
 
-    def html_to_json(html_content):
-        soup = BeautifulSoup(html_content, 'html.parser')
-        result = {}
-
-        schedule_days = soup.find_all('div', class_='schedule__day')
-        if not schedule_days:
-            print("WARNING: No 'schedule__day' found in HTML content!")
-            return {}
+        print(f"Found {len(channels_247) + len(live_events)} total channels:")
+        print(f"  - {len(channels_247)} 24/7 channels")
+        print(f"  - {len(live_events)} live events")
+        return playlist
 
-        for day_div in schedule_days:
-            day_title_div = day_div.find('div', class_='schedule__dayTitle')
-            if not day_title_div:
-                continue
-            current_date = day_title_div.get_text(strip=True)
-            result[current_date] = {}
-
-            for category_div in day_div.find_all('div', class_='schedule__category'):
-                cat_header = category_div.find('div', class_='schedule__catHeader')
-                if not cat_header:
-                    continue
-                
-                # We use the inner HTML to keep any tags, as before
-                current_category_html = cat_header.find('div', class_='card__meta').decode_contents()
-                current_category = current_category_html.strip() + "</span>" # Maintains compatibility with previous format
-                result[current_date][current_category] = []
-
-                for event_div in category_div.find_all('div', class_='schedule__event'):
-                    event_header = event_div.find('div', class_='schedule__eventHeader')
-                    if not event_header:
-                        continue
+    def save(self, result):
+        result.write(self.path)
+        print(f"Created file {self.path}")
 
-                    time_span = event_header.find('span', class_='schedule__time')
-                    event_title_span = event_header.find('span', class_='schedule__eventTitle')
-
-                    event_time = time_span.get_text(strip=True) if time_span else ""
-                    event_info = event_title_span.get_text(strip=True) if event_title_span else ""
-
-                    event_data = {
-                        "time": event_time,
-                        "event": event_info,
-                        "channels": []
-                    }
-
-                    channels_div = event_div.find('div', class_='schedule__channels')
-                    if channels_div:
-                        for link in channels_div.find_all('a'):
-                            href = link.get('href', '')
-                            channel_id_match = re.search(r'(?:watch|stream)-(\d+)\.php', href) or re.search(r'id=(\d+)', href)
-                            if channel_id_match:
-                                channel_id = channel_id_match.group(1)
-                                channel_name = link.get_text(strip=True)
-                                event_data["channels"].append({
-                                    "channel_name": channel_name,
-                                    "channel_id": channel_id
-                                })
-                    result[current_date][current_category].append(event_data)
-        return result
-    
-    def modify_json_file(json_file_path):
-        with open(json_file_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        
-        current_month = datetime.now().strftime("%B")
-    
-        for date in list(data.keys()):
-            match = re.match(r"(\w+\s\d+)(st|nd|rd|th)\s(\d{4})", date)
-            if match:
-                day_part = match.group(1)
-                suffix = match.group(2)
-                year_part = match.group(3)
-                new_date = f"{day_part}{suffix} {current_month} {year_part}"
-                data[new_date] = data.pop(date)
-    
-        with open(json_file_path, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=4)
-        
-        print(f"JSON file modified and saved in {json_file_path}")
-    
-    def extract_schedule_container():
-        url = f"https://dlhd.dad/"
-
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-        json_output = os.path.join(script_dir, "daddyliveSchedule.json")
-
-        print(f"Accessing page {url} to extract the schedule container...")
-
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=True)
-            context = browser.new_context(
-                user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) Chrome/120.0.0.0 Safari/537.36"
-            )
-            page = context.new_page()
-    
-            max_attempts = 3
-            for attempt in range(1, max_attempts + 1):
-                try:
-                    print(f"Attempt {attempt} of {max_attempts}...")
-                    page.goto(url)
-                    print("Waiting for full page load...")
-                    page.wait_for_timeout(10000)  # 10 seconds
-
-                    schedule_content = page.evaluate("""() => {
-                        const container = document.querySelector('body');
-                        return container ? container.outerHTML : '';
-                    }""")
-
-                    if not schedule_content:
-                        print("WARNING: Page content not found or empty!")
-                        if attempt == max_attempts:
-                            browser.close()
-                            return False
-                        else:
-                            continue
-    
-                    print("Converting main schedule HTML to JSON format...")
-                    json_data = html_to_json(schedule_content)
-    
-                    with open(json_output, "w", encoding="utf-8") as f:
-                        json.dump(json_data, f, indent=4)
-    
-                    print(f"JSON data saved in {json_output}")
-    
-                    modify_json_file(json_output)
-                    browser.close()
-                    return True
-    
-                except Exception as e:
-                    print(f"ERROR in attempt {attempt}: {str(e)}")
-                    if attempt == max_attempts:
-                        print("All attempts failed!")
-                        browser.close()
-                        return False
-                    else:
-                        print(f"Retrying... (attempt {attempt + 1} of {max_attempts})")
-    
-            browser.close()
-            return False
-    
-    if __name__ == "__main__":
-        success = extract_schedule_container()
-        if not success:
-            exit(1)
-
-def vavoo_channels():
-    # Code for the seventh script here
-    # Add the code of your "world_channels_generator.py" script in this function.
-    print("Running vavoo_channels...")
-    
-    def getAuthSignature():
-        headers = {
-            "user-agent": "okhttp/4.11.0",
-            "accept": "application/json",
-            "content-type": "application/json; charset=utf-8",
-            "content-length": "1106",
-            "accept-encoding": "gzip"
-        }
-        data = {
-            "token": "tosFwQCJMS8qrW_AjLoHPQ41646J5dRNha6ZWHnijoYQQQoADQoXYSo7ki7O5-CsgN4CH0uRk6EEoJ0728ar9scCRQW3ZkbfrPfeCXW2VgopSW2FWDqPOoVYIuVPAOnXCZ5g",
-            "reason": "app-blur",
-            "locale": "de",
-            "theme": "dark",
-            "metadata": {
-                "device": {
-                    "type": "Handset",
-                    "os": "Android",
-                    "osVersion": "10",
-                    "model": "Pixel 4",
-                    "brand": "Google"
-                }
-            }
-        }
-        resp = requests.post("https://vavoo.to/mediahubmx-signature.json", json=data, headers=headers, timeout=10)
-        return resp.json().get("signature")
-    
-    def vavoo_groups():
-        # You can add more groups for more channels
-        return [""]
-    
-    def clean_channel_name(name):
-        """Removes .a, .b, .c suffixes from the channel name"""
-        # Removes .a, .b, .c at the end of the name (with or without spaces before)
-        cleaned_name = re.sub(r'\s*\.(a|b|c|s|d|e|f|g|h|i|j|k|l|m|n|o|p|q|r|t|u|v|w|x|y|z)\s*$', '', name, flags=re.IGNORECASE)
-        return cleaned_name.strip()
-    
-    def get_channels():
-        signature = getAuthSignature()
-        headers = {
-            "user-agent": "okhttp/4.11.0",
-            "accept": "application/json",
-            "content-type": "application/json; charset=utf-8",
-            "accept-encoding": "gzip",
-            "mediahubmx-signature": signature
-        }
-        all_channels = []
-        for group in vavoo_groups():
-            cursor = 0
-            while True:
-                data = {
-                    "language": "de",
-                    "region": "AT",
-                    "catalogId": "iptv",
-                    "id": "iptv",
-                    "adult": False,
-                    "search": "",
-                    "sort": "name",
-                    "filter": {"group": group},
-                    "cursor": cursor,
-                    "clientVersion": "3.0.2"
-                }
-                resp = requests.post("https://vavoo.to/mediahubmx-catalog.json", json=data, headers=headers, timeout=10)
-                r = resp.json()
-                items = r.get("items", [])
-                all_channels.extend(items)
-                cursor = r.get("nextCursor")
-                if not cursor:
-                    break
-        return all_channels
-    
-    def save_as_m3u(channels, filename="vavoo.m3u"):
-        # 1. Collect all channels into a flat list
-        all_channels_flat = []
-        for ch in channels:
-            original_name = ch.get("name", "NoName")
-            name = clean_channel_name(original_name)
-            url = ch.get("url", "")
-            category = ch.get("group", "General")
-            if url:
-                all_channels_flat.append({'name': name, 'url': url, 'category': category})
 
-        # 2. Count occurrences of each name
-        name_counts = {}
-        for ch_data in all_channels_flat:
-            name_counts[ch_data['name']] = name_counts.get(ch_data['name'], 0) + 1
-
-        # 3. Rename duplicates
-        final_channels_data = []
-        name_counter = {}
-        for ch_data in all_channels_flat:
-            name = ch_data['name']
-            if name_counts[name] > 1:
-                if name not in name_counter:
-                    name_counter[name] = 1
-                    new_name = name  # Keep the original name for the first occurrence
-                else:
-                    name_counter[name] += 1
-                    new_name = f"{name} ({name_counter[name]})"
-            else:
-                new_name = name
-            final_channels_data.append({'name': new_name, 'url': ch_data['url'], 'category': ch_data['category']})
+class SportsonlineSource(Source):
+    """Today's events from the sportsonline schedule, with each channel's language."""
+    name = "sportsonline"
+    output_file = "sportsonline.m3u"
+    prog_url = "https://sportsonline.sn/prog.txt"  # URL of the schedule file
+    weekdays = ["MONDAY", "TUESDAY", "WEDNESDAY", "THURSDAY", "FRIDAY", "SATURDAY", "SUNDAY"]
 
-        # 4. Group channels by category for file writing
-        channels_by_category = {}
-        for ch_data in final_channels_data:
-            category = ch_data['category']
-            if category not in channels_by_category:
-                channels_by_category[category] = []
-            channels_by_category[category].append((ch_data['name'], ch_data['url']))
-
-        # 5. Write the M3U file
-        with open(filename, "w", encoding="utf-8") as f:
-            f.write("#EXTM3U\n")
-            for category in sorted(channels_by_category.keys()):
-                channel_list = sorted(channels_by_category[category], key=lambda x: x[0].lower())
-                f.write(f"\n# {category.upper()}\n")
-                for name, url in channel_list:
-                    f.write(f'#EXTINF:-1 group-title="{category} VAVOO",{name}\n{url}\n')
-
-        print(f"M3U playlist saved in: {filename}")
-        print(f"Channels organized in {len(channels_by_category)} categories:")
-        for category, channel_list in channels_by_category.items():
-            print(f"  - {category}: {len(channel_list)} channels")
-    
-    if __name__ == "__main__":
-        channels = get_channels()
-        print(f"Found {len(channels)} channels. Creating M3U playlist with proxy links...")
-        save_as_m3u(channels) 
-        
-def sportsonline():
-    import requests
-    import re
-    from bs4 import BeautifulSoup
-    import datetime
-    
-    # URL of the schedule file
-    PROG_URL = "https://sportsonline.sn/prog.txt"
-    OUTPUT_FILE = "sportsonline.m3u"  # Defined as a constant
-    
-    def get_channel_languages(lines):
+    def get_channel_languages(self, lines):
         """
         Analyzes the lines of the schedule file to map channels with their languages.
         Returns a dictionary with key=channel_id and value=language (e.g. {'hd7': 'ITALIAN'}).
@@ -557,13 +536,13 @@ def sportsonline():
                     channel_id_raw = parts[0].strip()
                     language = parts[1].strip()
                     # Check that the first element is a channel ID (e.g. HD7, BR1, etc.)
-                    if channel_id_raw and not any(day in channel_id_raw.upper() for day in 
-                        ["MONDAY", "TUESDAY", "WEDNESDAY", "THURSDAY", "FRIDAY", "SATURDAY", "SUNDAY"]):
+                    if channel_id_raw and not any(day in channel_id_raw.upper() for day in self.weekdays):
                         channel_id = channel_id_raw.lower()
                         channel_language_map[channel_id] = language
                         print(f"[INFO] Found channel: {channel_id.upper()} - Language: {language}")
         return channel_language_map
-    
+
+    @staticmethod
     def extract_channel_from_url(url):
         """
         Extracts the channel identifier from the URL.
@@ -573,140 +552,183 @@ def sportsonline():
         if match:
             return match.group(1).lower()
         return None
-    
-    print("Running sportsonline...")
-    
-    # --- Check the day of the week ---
-    today_weekday = datetime.date.today().weekday()
-    weekdays_english = ["MONDAY", "TUESDAY", "WEDNESDAY", "THURSDAY", "FRIDAY", "SATURDAY", "SUNDAY"]
-    day_to_filter = weekdays_english[today_weekday]
-    print(f"Today is {day_to_filter}, only today's events will be searched.")
-
-    print(f"1. Downloading schedule from: {PROG_URL}")
-    try:
-        response = requests.get(PROG_URL, timeout=10)
+
+    def fetch(self):
+        # --- Check the day of the week ---
+        day_to_filter = self.weekdays[datetime.now().date().weekday()]
+        print(f"Today is {day_to_filter}, only today's events will be searched.")
+
+        print(f"1. Downloading schedule from: {self.prog_url}")
+        response = requests.get(self.prog_url, timeout=10)
         response.raise_for_status()
-    except requests.exceptions.RequestException as e:
-        print(f"[FATAL ERROR] Unable to download the schedule file: {e}")
-        return
 
-    lines = response.text.splitlines()
+        lines = response.text.splitlines()
 
-    print("\n2. Mapping channels with their respective languages...")
-    channel_language_map = get_channel_languages(lines)
+        print("\n2. Mapping channels with their respective languages...")
+        channel_language_map = self.get_channel_languages(lines)
 
-    if not channel_language_map:
-        print("[WARNING] No channel with language found in the schedule.")
-        return
+        if not channel_language_map:
+            print("[WARNING] No channel with language found in the schedule.")
+            return None
 
-    playlist_entries = []
+        playlist_entries = []
 
-    print("\n3. Searching for broadcasted Events...")
+        print("\n3. Searching for broadcasted Events...")
 
-    processing_today_events = False
+        processing_today_events = False
 
-    for line in lines:
-        line_upper = line.upper().strip()
+        for line in lines:
+            line_upper = line.upper().strip()
 
-        # Check if the line is a weekday header
-        if line_upper in weekdays_english:
-            if line_upper == day_to_filter:
-                processing_today_events = True
-            else:
-                processing_today_events = False
-            continue
-
-        # Process the line only if we are in the correct day's section
-        if not processing_today_events:
-            continue
-
-        if '|' not in line:
-            continue
-
-        parts = line.split('|')
-        if len(parts) != 2:
-            continue
-
-        event_info = parts[0].strip()
-        page_url = parts[1].strip()
-
-        # Extract the channel from the URL
-        channel_id = extract_channel_from_url(page_url)
-        
-        if channel_id and channel_id in channel_language_map:
-            language = channel_language_map[channel_id]
-            print(f"\n[EVENT] Found event: '{event_info}' - Channel: {channel_id.upper()} - Language: {language}")
-            
-            # Reformat the event name: Event Name Time [LANGUAGE]
-            event_parts = event_info.split(maxsplit=1)
-            if len(event_parts) == 2:
-                time_str_original, name_only = event_parts
-                
-                # Add 1 hour to the time
+            # Check if the line is a weekday header
+            if line_upper in self.weekdays:
+                processing_today_events = line_upper == day_to_filter
+                continue
+
+            # Process the line only if we are in the correct day's section
+            if not processing_today_events:
+                continue
+
+            if '|' not in line:
+                continue
+
+            parts = line.split('|')
+            if len(parts) != 2:
+                continue
+
+            event_info = parts[0].strip()
+            page_url = parts[1].strip()
+
+            # Extract the channel from the URL
+            channel_id = self.extract_channel_from_url(page_url)
+
+            if channel_id and channel_id in channel_language_map:
+                language = channel_language_map[channel_id]
+                print(f"\n[EVENT] Found event: '{event_info}' - Channel: {channel_id.upper()} - Language: {language}")
+
+                # Reformat the event name: Event Name Time [LANGUAGE]
+                event_parts = event_info.split(maxsplit=1)
+                if len(event_parts) == 2:
+                    time_str_original, name_only = event_parts
+
+                    # Add 1 hour to the time
+                    try:
+                        original_time = datetime.strptime(time_str_original.strip(), '%H:%M')
+                        new_time = original_time + timedelta(hours=1)
+                        time_str = new_time.strftime('%H:%M')
+                    except ValueError:
+                        time_str = time_str_original.strip()
+
+                    event_name = f"{name_only.strip()} {time_str} [{language}]"
+                else:
+                    event_name = f"{event_info} [{language}]"
+
+                playlist_entries.append(Entry(event_name, page_url, {"group-title": "Live Events SPORTSONLINE"}))
+
+        # Create fallback channel if there are no events
+        if not playlist_entries:
+            print("\n[INFO] No events found today.")
+            print("[INFO] Creating fallback channel 'NO EVENT'...")
+            playlist_entries.append(Entry(
+                "NO EVENT", "https://cph-p2p-msl.akamaized.net/hls/live/2000341/test/master.m3u8",
+                {"group-title": "Live Events SPORTSONLINE"}
+            ))
+
+        return Playlist(playlist_entries)
+
+    def save(self, result):
+        print(f"\n4. Writing playlist to file: {self.path}")
+        result.write(self.path)
+        print(f"\n[COMPLETED] Playlist created successfully! Open the file '{self.path}' with a player like VLC.")
+
+
+SOURCES = {source.name: source for source in (ScheduleSource, VavooSource, DlhdSource, SportsonlineSource)}
+
+
+def run_source(source):
+    """Fetch and save one source. Returns the wall time; exceptions propagate to the caller."""
+    start = time.perf_counter()
+    print(f"Running {source.name}...")
+    result = source.fetch()
+    if result is None:
+        print(f"{source.name}: nothing to write, {source.path} left unchanged")
+    else:
+        source.save(result)
+    return time.perf_counter() - start
+
+
+def run_sources(sources, max_workers=None):
+    """
+    Run the sources on a thread pool. A source is submitted once every source it requires has
+    finished (successfully or not: dlhd then works from the schedule already on disk); sources
+    that aren't being run don't count as requirements. A failing source is reported and
+    doesn't stop the others. Returns {name: (elapsed seconds, exception or None)}.
+    """
+    names = {source.name for source in sources}
+    pending = list(sources)
+    running = {}
+    results = {}
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers or len(sources) or 1) as executor:
+        while pending or running:
+            for source in list(pending):
+                if all(name in results for name in source.requires if name in names):
+                    pending.remove(source)
+                    running[executor.submit(run_source, source)] = (source, time.perf_counter())
+
+            done, _ = concurrent.futures.wait(running, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                source, start = running.pop(future)
                 try:
-                    original_time = datetime.datetime.strptime(time_str_original.strip(), '%H:%M')
-                    new_time = original_time + datetime.timedelta(hours=1)
-                    time_str = new_time.strftime('%H:%M')
-                except ValueError:
-                    time_str = time_str_original.strip()
-                
-                event_name = f"{name_only.strip()} {time_str} [{language}]"
-            else:
-                event_name = f"{event_info} [{language}]"
-
-            playlist_entries.append({
-                "name": event_name,
-                "url": page_url,
-                "referrer": "https://sportsonline.sn/",
-                "user_agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-            })
-    
-    # Create fallback channel if there are no events
-    if not playlist_entries:
-        print("\n[INFO] No events found today.")
-        print("[INFO] Creating fallback channel 'NO EVENT'...")
-        playlist_entries.append({
-            "name": "NO EVENT", 
-            "url": "https://cph-p2p-msl.akamaized.net/hls/live/2000341/test/master.m3u8",
-            "referrer": "https://sportsonline.sn/",
-            "user_agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-        })
-
-    # 4. Create the M3U file
-    print(f"\n4. Writing playlist to file: {OUTPUT_FILE}")
-    with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-        f.write("#EXTM3U\n")
-        for entry in playlist_entries:
-            f.write(f'#EXTINF:-1 group-title="Live Events SPORTSONLINE",{entry["name"]}\n')
-            f.write(f'{entry["url"]}\n')
-
-    print(f"\n[COMPLETED] Playlist created successfully! Open the file '{OUTPUT_FILE}' with a player like VLC.")
-
-def main():
-    try:
-        try:
-            schedule_extractor()
-        except Exception as e:
-            print(f"Error during execution of schedule_extractor: {e}")
-            return
-        try:
-            vavoo_channels()
-        except Exception as e:
-            print(f"Error during execution of vavoo_channels: {e}")
-            return
-        try:
-            dlhd()
-        except Exception as e:
-            print(f"Error during execution of dlhd: {e}")
-            return
-        try:
-            sportsonline()
-        except Exception as e:
-            print(f"Error during execution of sportsonline: {e}")
-            return
+                    results[source.name] = (future.result(), None)
+                except ImportError as e:
+                    print(f"ERROR: {source.name} needs {', '.join(source.packages)}: pip install {' '.join(source.packages)} ({e})", file=sys.stderr)
+                    results[source.name] = (time.perf_counter() - start, e)
+                except Exception as e:
+                    print(f"Error during execution of {source.name}: {e}")
+                    results[source.name] = (time.perf_counter() - start, e)
+    return results
+
+
+def report(results):
+    width = max(len(name) for name in results)
+    print("\nSource timings:")
+    for name, (elapsed, error) in results.items():
+        status = "ok" if error is None else f"FAILED: {error}"
+        print(f"  {name:<{width}}  {elapsed:8.3f}s  {status}")
+
+
+def parse_sources(value):
+    names = [name.strip() for name in value.split(",") if name.strip()]
+    unknown = [name for name in names if name not in SOURCES]
+    if unknown or not names:
+        raise argparse.ArgumentTypeError(f"unknown source(s) {', '.join(unknown)}; choose from {', '.join(SOURCES)}")
+    return names
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Fetch the playlists (and the DaddyLive schedule).")
+    arg_parser.add_argument("--sources", type=parse_sources, default=list(SOURCES),
+                            help=f"comma-separated subset of {','.join(SOURCES)} (default: all)")
+    arg_parser.add_argument("--out-dir", default=".", help="where the playlists and schedule JSON are written")
+    arg_parser.add_argument("--schedule-url", default=ScheduleSource.url,
+                            help="page the schedule is scraped from, e.g. a saved copy served with python -m http.server")
+    args = arg_parser.parse_args(argv)
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    sources = [SOURCES[name](args.out_dir) for name in args.sources]
+    for source in sources:
+        if isinstance(source, ScheduleSource):
+            source.url = args.schedule_url
+    results = run_sources(sources)
+    report(results)
+    failed = [name for name, (_, error) in results.items() if error is not None]
+    if failed:
+        print(f"{len(failed)} of {len(results)} sources failed: {', '.join(failed)}")
+    else:
         print("All scripts executed successfully!")
-    finally:
-        pass
+    # Exit non-zero when nothing was fetched so the workflow doesn't commit stale playlists
+    return 1 if len(failed) == len(results) else 0
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
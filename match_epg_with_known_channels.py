@@ -5,6 +5,10 @@ import os
 import difflib
 import unicodedata
 import json
+from collections import defaultdict
+
+from epg_reader import iter_channels
+from playlist import read_playlist
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(message)s')
 
@@ -21,17 +25,18 @@ if os.path.abspath(M3U_FILE) == os.path.abspath(OUTPUT_FILE):
 logging.info(f"Reading from {os.path.abspath(M3U_FILE)}")
 logging.info(f"Writing to {os.path.abspath(OUTPUT_FILE)}")
 
+def build_epg_mapping(channels):
+    """Return a dict of display-name -> id from ChannelRecords (first display-name per channel)"""
+    mapping = {}
+    for channel in channels:
+        display_name = channel.display_names[0] if channel.display_names else None
+        if display_name:
+            mapping[display_name.strip().lower()] = channel.id
+    return mapping
+
 def parse_epg(epg_path):
     """Parse EPG XML and return a dict of display-name -> id"""
-    tree = ET.parse(epg_path)
-    root = tree.getroot()
-    mapping = {}
-    for channel in root.findall("channel"):
-        chan_id = channel.get("id")
-        name_elem = channel.find("display-name")
-        if name_elem is not None and name_elem.text:
-            display_name = name_elem.text.strip().lower()
-            mapping[display_name] = chan_id
+    mapping = build_epg_mapping(iter_channels(epg_path))
     logging.info(f"Parsed {len(mapping)} channels from EPG.")
     return mapping
 
@@ -61,17 +66,97 @@ ALIASES = {
     "nova sport 2": "nova_sport_2_cz",
 }
 
-def match_channel_name(epg_mapping, line):
-    """Try to find a channel name in M3U EXTINF line and return its tvg-id"""
-    match = re.search(r',([^,\n]+)$', line)
-    if not match:
+# Number of best trigram-overlap candidates scored with difflib per lookup
+FUZZY_SHORTLIST_SIZE = 30
+# Set to True to also run the exhaustive fuzzy scan and log every lookup where the shortlist disagrees
+VERIFY_FUZZY_SHORTLIST = False
+
+def padded_trigrams(s):
+    """Character trigrams of s with boundary padding, so short names still get trigrams."""
+    padded = f"  {s} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def inner_trigrams(s):
+    """Character trigrams fully inside s (no padding); used for substring pruning."""
+    return {s[i:i + 3] for i in range(len(s) - 2)}
+
+class EPGIndex:
+    """
+    Normalized EPG display names plus a character trigram -> position inverted index.
+    Built once per run from parse_epg() so each lookup only scores a small shortlist.
+    """
+
+    def __init__(self, epg_mapping):
+        # Same semantics as {normalize(k): v}: first-seen order, last id wins
+        exact = {normalize(k): v for k, v in epg_mapping.items()}
+        self.exact = exact
+        self.names = list(exact.keys())
+        self.ids = list(exact.values())
+        self.postings = defaultdict(list)
+        self.inner_counts = []
+        self.short_positions = []  # names too short to have inner trigrams
+
+        for pos, name in enumerate(self.names):
+            for tri in padded_trigrams(name):
+                self.postings[tri].append(pos)
+            inner = inner_trigrams(name)
+            self.inner_counts.append(len(inner))
+            if not inner:
+                self.short_positions.append(pos)
+
+        logging.info(f"Indexed {len(self.names)} EPG names into {len(self.postings)} trigrams.")
+
+    def substring_match(self, display_norm):
+        """First EPG name (in EPG order) contained in display_norm or containing it."""
+        if len(display_norm) < 3:
+            positions = range(len(self.names))
+        else:
+            query = inner_trigrams(display_norm)
+            shared = defaultdict(int)
+            for tri in query:
+                for pos in self.postings.get(tri, ()):
+                    shared[pos] += 1
+            # display in name needs every query trigram; name in display needs every name trigram
+            positions = sorted(
+                [pos for pos, n in shared.items() if n == len(query) or n == self.inner_counts[pos]]
+                + self.short_positions
+            )
+        for pos in positions:
+            epg_norm = self.names[pos]
+            if epg_norm in display_norm or display_norm in epg_norm:
+                return pos
         return None
-    display_name = match.group(1).strip()
-    display_norm = normalize(display_name)
 
-    # Pre-index normalized EPG mapping for performance
-    if not hasattr(match_channel_name, "epg_index"):
-        match_channel_name.epg_index = {normalize(k): v for k, v in epg_mapping.items()}
+    def fuzzy_match(self, display_norm):
+        """Best difflib ratio among the names sharing the most trigrams with display_norm."""
+        shared = defaultdict(int)
+        for tri in padded_trigrams(display_norm):
+            for pos in self.postings.get(tri, ()):
+                shared[pos] += 1
+        shortlist = sorted(shared, key=lambda pos: (-shared[pos], pos))[:FUZZY_SHORTLIST_SIZE]
+        return self._best_ratio(display_norm, sorted(shortlist))
+
+    def exhaustive_fuzzy_match(self, display_norm):
+        return self._best_ratio(display_norm, range(len(self.names)))
+
+    def _best_ratio(self, display_norm, positions):
+        matcher = difflib.SequenceMatcher(None, display_norm)
+        best_pos, best_ratio = None, 0
+        for pos in positions:
+            matcher.set_seq2(self.names[pos])
+            ratio = matcher.ratio()
+            if ratio > best_ratio:
+                best_pos, best_ratio = pos, ratio
+        return best_pos, best_ratio
+
+def match_channel_name(epg_mapping, name, epg_index):
+    """Try to find the display name of a playlist entry in the EPG and return its tvg-id"""
+    # Only the text after the last comma is matched, so event titles ("..., May 5–17, 2026 (15:00)")
+    # are looked up by their tail like before instead of fuzzily matching a channel
+    display_name = name.rsplit(",", 1)[-1].strip()
+    if not display_name:
+        return None
+    display_norm = normalize(display_name)
 
     # Check aliases first
     for alias, real in ALIASES.items():
@@ -82,72 +167,108 @@ def match_channel_name(epg_mapping, line):
                     return chan_id
 
     # 1️⃣ Exact normalized match
-    if display_norm in match_channel_name.epg_index:
-        return match_channel_name.epg_index[display_norm]
-
-    # 2️⃣ Partial substring containment
-    for epg_norm, chan_id in match_channel_name.epg_index.items():
-        if epg_norm in display_norm or display_norm in epg_norm:
-            logging.debug(f"Partial match: '{display_name}' -> '{epg_norm}'")
-            return chan_id
-
-    # 3️⃣ Fuzzy similarity threshold
-    best_match, best_ratio = None, 0
-    for epg_norm, chan_id in match_channel_name.epg_index.items():
-        ratio = difflib.SequenceMatcher(None, display_norm, epg_norm).ratio()
-        if ratio > best_ratio:
-            best_match, best_ratio = chan_id, ratio
+    if display_norm in epg_index.exact:
+        return epg_index.exact[display_norm]
+
+    # 2️⃣ Partial substring containment (trigram-pruned, same first-match result as a full scan)
+    pos = epg_index.substring_match(display_norm)
+    if pos is not None:
+        logging.debug(f"Partial match: '{display_name}' -> '{epg_index.names[pos]}'")
+        return epg_index.ids[pos]
+
+    # 3️⃣ Fuzzy similarity threshold, scored only on the trigram shortlist
+    best_pos, best_ratio = epg_index.fuzzy_match(display_norm)
+    if VERIFY_FUZZY_SHORTLIST:
+        full_pos, full_ratio = epg_index.exhaustive_fuzzy_match(display_norm)
+        if (full_ratio >= 0.72 or best_ratio >= 0.72) and full_pos != best_pos:
+            logging.warning(
+                f"Fuzzy shortlist differs for '{display_name}': "
+                f"shortlist={epg_index.names[best_pos] if best_pos is not None else None} ({best_ratio:.3f}), "
+                f"exhaustive={epg_index.names[full_pos]} ({full_ratio:.3f})"
+            )
 
     if best_ratio >= 0.72:  # adjustable similarity threshold
-        return best_match
+        return epg_index.ids[best_pos]
 
     logging.debug(f"No match for '{display_name}' (normalized: {display_norm})")
     return None
 
+def add_tvg_ids(entries, epg_mapping):
+    """Add a matched tvg-id to every playlist Entry that lacks one. Returns the number added."""
+    epg_index = EPGIndex(epg_mapping)
+
+    tvg_id_added_count = 0
+
+    for number, entry in enumerate(entries, 1):
+        logging.debug(f"Processing entry {number}: {entry.name}")
+        if not entry.attrs.get("tvg-id"):
+            tvg_id = match_channel_name(epg_mapping, entry.name, epg_index)
+            if tvg_id:
+                entry.attrs = {"tvg-id": tvg_id, **entry.attrs}
+                tvg_id_added_count += 1
+                logging.info(f"Added tvg-id '{tvg_id}' for '{entry.name}'.")
+            else:
+                logging.info(f"No matching tvg-id found for '{entry.name}'.")
+
+    return tvg_id_added_count
+
 def main():
     epg_mapping = parse_epg(EPG_FILE)
 
-    tvg_id_added_count = 0
-    lines = []
-
-    with open(M3U_FILE, "r", encoding="utf-8") as infile:
-        for line_number, line in enumerate(infile, 1):
-            if line.startswith("#EXTINF"):
-                logging.debug(f"Processing line {line_number}: {line.strip()}")
-                tvg_match = re.search(r'tvg-id="([^"]+)"', line)
-                if not tvg_match:
-                    tvg_id = match_channel_name(epg_mapping, line)
-                    if tvg_id:
-                        line = re.sub(
-                            r'(#EXTINF:-1)',
-                            rf'\1 tvg-id="{tvg_id}"',
-                            line
-                        )
-                        tvg_id_added_count += 1
-                        logging.info(f"Added tvg-id '{tvg_id}' on line {line_number}.")
-                    else:
-                        logging.info(f"No matching tvg-id found for channel on line {line_number}.")
-            lines.append(line)
+    playlist = read_playlist(M3U_FILE)
+    tvg_id_added_count = add_tvg_ids(playlist.entries, epg_mapping)
 
     if tvg_id_added_count == 0:
         logging.warning("⚠️ No tvg-id entries were added. Writing diagnostic output file for inspection.")
-        with open(OUTPUT_FILE, "w", encoding="utf-8") as outfile:
-            outfile.writelines(lines)
+        playlist.write(OUTPUT_FILE)
         return
 
-    with open(OUTPUT_FILE, "w", encoding="utf-8") as outfile:
-        outfile.writelines(lines)
+    playlist.write(OUTPUT_FILE)
 
     logging.info(f"✅ Updated playlist written to {OUTPUT_FILE} with {tvg_id_added_count} tvg-ids added.")
 
-def update_epg_with_known_ids(epg_path, known_ids_path, output_path):
-    """Update EPG channel ids based on known_channel_ids.json"""
-    # Load known IDs JSON
+def apply_known_ids(root, known_ids):
+    """Rename EPG channel ids (and their programmes) whose display-name is in known_ids"""
+    # Build mapping from old ids to new ids
+    old_to_new_id = {}
+
+    # Iterate channels and update ids if display-name matches known ids
+    for channel in root.findall("channel"):
+        name_elem = channel.find("display-name")
+        if name_elem is not None and name_elem.text:
+            display_name_norm = name_elem.text.strip().lower()
+            if display_name_norm in known_ids:
+                old_id = channel.get("id")
+                new_id = known_ids[display_name_norm]
+                if old_id != new_id:
+                    logging.info(f"Updating channel id for '{name_elem.text.strip()}': '{old_id}' -> '{new_id}'")
+                    old_to_new_id[old_id] = new_id
+                    channel.set("id", new_id)
+
+    # Update programme elements channel attribute if matching old ids
+    for programme in root.findall("programme"):
+        ch = programme.get("channel")
+        if ch in old_to_new_id:
+            new_ch = old_to_new_id[ch]
+            logging.info(f"Updating programme channel attribute: '{ch}' -> '{new_ch}'")
+            programme.set("channel", new_ch)
+
+    return old_to_new_id
+
+def load_known_ids(known_ids_path):
+    """Load known_channel_ids.json (display-name -> id), or None if it can't be read"""
     try:
         with open(known_ids_path, "r", encoding="utf-8") as f:
-            known_ids = json.load(f)
+            return json.load(f)
     except Exception as e:
         logging.error(f"Failed to load known IDs JSON from {known_ids_path}: {e}")
+        return None
+
+def update_epg_with_known_ids(epg_path, known_ids_path, output_path):
+    """Update EPG channel ids based on known_channel_ids.json"""
+    # Load known IDs JSON
+    known_ids = load_known_ids(known_ids_path)
+    if known_ids is None:
         return
 
     # Read EPG content, handling .rtf by extracting XML content
@@ -172,29 +293,7 @@ def update_epg_with_known_ids(epg_path, known_ids_path, output_path):
         logging.error(f"Failed to parse EPG XML from {epg_path}: {e}")
         return
 
-    # Build mapping from old ids to new ids
-    old_to_new_id = {}
-
-    # Iterate channels and update ids if display-name matches known ids
-    for channel in root.findall("channel"):
-        name_elem = channel.find("display-name")
-        if name_elem is not None and name_elem.text:
-            display_name_norm = name_elem.text.strip().lower()
-            if display_name_norm in known_ids:
-                old_id = channel.get("id")
-                new_id = known_ids[display_name_norm]
-                if old_id != new_id:
-                    logging.info(f"Updating channel id for '{name_elem.text.strip()}': '{old_id}' -> '{new_id}'")
-                    old_to_new_id[old_id] = new_id
-                    channel.set("id", new_id)
-
-    # Update programme elements channel attribute if matching old ids
-    for programme in root.findall("programme"):
-        ch = programme.get("channel")
-        if ch in old_to_new_id:
-            new_ch = old_to_new_id[ch]
-            logging.info(f"Updating programme channel attribute: '{ch}' -> '{new_ch}'")
-            programme.set("channel", new_ch)
+    apply_known_ids(root, known_ids)
 
     # Write updated XML to output_path
     try:
@@ -0,0 +1,202 @@
+import os
+import re
+import sys
+import bisect
+import logging
+import argparse
+import xml.etree.ElementTree as ET
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from concurrent.futures import ProcessPoolExecutor
+
+from epg_reader import iter_elements, parse_iso_time, parse_xmltv_time
+from guide_index import EPG_DIR, GuideIndex
+from playlist import read_playlist
+
+# --- CONFIGURATION ---
+PLAYLIST_FILE = "dlhd_with_logos.m3u"
+OUTPUT_FILE = "epg_merged.xml"
+WINDOW_PAST_HOURS = 6  # keep programmes that ended at most this long ago
+WINDOW_FUTURE_HOURS = 48  # ... and that start at most this far ahead
+MAX_WORKERS = None  # worker processes; None uses every CPU
+
+# Country words used as tvg-id suffixes -> the two-letter code epgshare ids end with
+COUNTRY_SUFFIXES = {"usa": "us", "canada": "ca", "france": "fr", "germany": "de", "spain": "es", "italy": "it",
+                    "greece": "gr", "portugal": "pt", "netherlands": "nl", "poland": "pl", "turkey": "tr",
+                    "croatia": "hr", "serbia": "rs", "bulgaria": "bg", "australia": "au", "malaysia": "my"}
+
+
+def playlist_channels(playlist_path):
+    """{tvg-id: display name} for every entry of the playlist that has a tvg-id."""
+    channels = {}
+    for entry in read_playlist(playlist_path).entries:
+        tvg_id = entry.attrs.get("tvg-id")
+        if tvg_id and tvg_id not in channels:
+            channels[tvg_id] = entry.name
+    return channels
+
+
+def id_country(tvg_id, guide_index):
+    """
+    The two-letter country code a tvg-id ends with, or None when its suffix is not a known
+    country: neither a COUNTRY_SUFFIXES word or code nor a code some epgshare id ends with.
+    """
+    suffix = re.split(r"[._]", tvg_id)[-1].lower()
+    country = COUNTRY_SUFFIXES.get(suffix, suffix)
+    if country in COUNTRY_SUFFIXES.values() or country in guide_index.countries:
+        return country
+    return None
+
+
+def resolve_sources(channels, guide_index):
+    """
+    Find every guide channel that carries one of our channels, first by id and failing that by
+    display name. Returns ({guide file: {guide channel id: our tvg-id}}, {our tvg-id: icon}).
+    """
+    sources = defaultdict(dict)
+    icons = {}
+    for tvg_id, name in channels.items():
+        matches = guide_index.by_id(tvg_id)
+        if not matches:
+            matches = guide_index.by_name(name)
+            # The same name exists in many countries. When our id carries a country code
+            # ("animal-planet.us", "bbc_two_uk", "bet_usa") only that country's channel will do;
+            # a schedule from the wrong country is worse than none. Other suffixes ("foo.tv",
+            # "foo_hd") say nothing about the country, so every name match is kept for them.
+            country = id_country(tvg_id, guide_index)
+            if country:
+                matches = [m for m in matches if m[1].rsplit(".", 1)[-1].lower() == country]
+        for guide, channel_id, _, icon, programmes in matches:
+            if programmes:
+                sources[guide][channel_id] = tvg_id
+                if icon:
+                    icons.setdefault(tvg_id, icon)
+    return dict(sources), icons
+
+
+def extract_programmes(path, wanted, window_start, window_stop):
+    """
+    Stream one guide and return (tvg-id, start, stop, xml) for each programme of a wanted channel
+    that overlaps the window, with its channel attribute already renamed to our tvg-id. Runs in a
+    worker process; only the matching programmes are ever kept in memory.
+    """
+    found = []
+    for _, elem in iter_elements(path):
+        if elem.tag != "programme":
+            continue
+        tvg_id = wanted.get(elem.get("channel"))
+        if tvg_id is None:
+            continue
+        start = parse_xmltv_time(elem.get("start"))
+        if start is None:
+            continue
+        stop = parse_xmltv_time(elem.get("stop")) or start
+        if stop < window_start or start > window_stop:
+            continue
+        elem.set("channel", tvg_id)
+        elem.tail = None
+        found.append((tvg_id, start, stop, ET.tostring(elem, encoding="unicode")))
+    return found
+
+
+def dedupe(programmes_by_guide):
+    """
+    Merge one channel's programmes from several guides: the guide with the most programmes is
+    taken as-is, the others only fill the gaps it leaves. Returns the kept programmes by start.
+    """
+    ordered = sorted(programmes_by_guide.items(), key=lambda item: (-len(item[1]), item[0]))
+    starts, stops, kept = [], [], []
+    for _, programmes in ordered:
+        for programme in sorted(programmes, key=lambda p: p[1]):
+            _, start, stop, _ = programme
+            pos = bisect.bisect_right(starts, start)
+            if pos and stops[pos - 1] > start:
+                continue  # overlaps the previous kept programme
+            if pos < len(starts) and starts[pos] < stop:
+                continue  # overlaps the next kept programme
+            starts.insert(pos, start)
+            stops.insert(pos, stop)
+            kept.insert(pos, programme)
+    return kept
+
+
+def write_merged(output_path, channels, icons, merged):
+    """Stream the merged guide: one <channel> per tvg-id with programmes, then the programmes."""
+    tmp_path = output_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8", errors="xmlcharrefreplace") as out:
+        out.write("<?xml version='1.0' encoding='utf-8'?>\n<tv>")
+        for tvg_id in merged:
+            channel = ET.Element("channel", id=tvg_id)
+            ET.SubElement(channel, "display-name").text = channels[tvg_id]
+            if tvg_id in icons:
+                ET.SubElement(channel, "icon", src=icons[tvg_id])
+            out.write(ET.tostring(channel, encoding="unicode"))
+        for programmes in merged.values():
+            for _, _, _, xml in programmes:
+                out.write(xml)
+        out.write("</tv>")
+    os.replace(tmp_path, output_path)
+
+
+def merge(playlist_path=PLAYLIST_FILE, output_path=OUTPUT_FILE, now=None,
+          past_hours=WINDOW_PAST_HOURS, future_hours=WINDOW_FUTURE_HOURS, max_workers=MAX_WORKERS):
+    """Write output_path with the guide data for playlist_path's tvg-ids within the time window."""
+    now = now or datetime.now(timezone.utc)
+    start_ts = (now - timedelta(hours=past_hours)).timestamp()
+    stop_ts = (now + timedelta(hours=future_hours)).timestamp()
+
+    channels = playlist_channels(playlist_path)
+    sources, icons = resolve_sources(channels, GuideIndex.load())
+    logging.info(
+        f"{len(channels)} tvg-ids in {playlist_path}; "
+        f"{len(set(t for s in sources.values() for t in s.values()))} found in {len(sources)} guides"
+    )
+
+    # tvg-id -> guide -> programmes
+    collected = defaultdict(lambda: defaultdict(list))
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            guide: executor.submit(extract_programmes, os.path.join(EPG_DIR, guide), wanted, start_ts, stop_ts)
+            for guide, wanted in sorted(sources.items())
+        }
+        for guide, future in futures.items():
+            try:
+                programmes = future.result()
+            except Exception as e:
+                logging.error(f"Failed to read {guide}: {e}")
+                continue
+            for programme in programmes:
+                collected[programme[0]][guide].append(programme)
+
+    merged = {}
+    total = dropped = 0
+    for tvg_id in sorted(collected):
+        by_guide = collected[tvg_id]
+        kept = dedupe(by_guide)
+        total += sum(len(p) for p in by_guide.values())
+        dropped += sum(len(p) for p in by_guide.values()) - len(kept)
+        merged[tvg_id] = kept
+
+    write_merged(output_path, channels, icons, merged)
+    logging.info(
+        f"Wrote {output_path}: {len(merged)} channels, {total - dropped} programmes "
+        f"({dropped} overlapping duplicates dropped)"
+    )
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Merge epgshare programmes for the channels of a playlist.")
+    arg_parser.add_argument("--playlist", default=PLAYLIST_FILE)
+    arg_parser.add_argument("--output", default=OUTPUT_FILE)
+    arg_parser.add_argument("--past-hours", type=float, default=WINDOW_PAST_HOURS)
+    arg_parser.add_argument("--future-hours", type=float, default=WINDOW_FUTURE_HOURS)
+    arg_parser.add_argument("--now", type=parse_iso_time, default=None,
+                            help="centre of the time window (ISO 8601, UTC if no offset); defaults to now")
+    args = arg_parser.parse_args(argv)
+
+    merge(args.playlist, args.output, args.now, args.past_hours, args.future_hours)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    sys.exit(main())
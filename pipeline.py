@@ -0,0 +1,155 @@
+import io
+import sys
+import json
+import time
+import logging
+import argparse
+import xml.etree.ElementTree as ET
+
+# Configure logging before the stage modules are imported; their own basicConfig calls become no-ops
+logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(message)s')
+
+import json_to_epg
+import match_epg_with_known_channels as match_epg
+import add_country_categories_to_dlhd as country
+import add_logos_to_dlhd_m3u as logos_m3u
+import add_logos_to_epg as logos_epg
+import merge_epg
+from epg_reader import channel_record
+from playlist import read_playlist
+
+# ---- CONFIGURATION ----
+SCHEDULE_FILE = json_to_epg.INPUT_FILE          # daddyliveSchedule.json
+PLAYLIST_FILE = match_epg.M3U_FILE               # dlhd.m3u
+KNOWN_IDS_FILE = "known_channel_ids.json"
+EPG_FILE = logos_epg.OUTPUT_FILE                 # epg.xml
+MATCHED_FILE = match_epg.OUTPUT_FILE             # dlhd_match_to_epg.m3u (intermediate)
+COUNTRY_FILE = country.OUTPUT_FILE               # dlhd_with_country_categories.m3u (intermediate)
+OUTPUT_FILE = logos_m3u.OUTPUT_FILE              # dlhd_with_logos.m3u
+
+
+class StageTimer:
+    """Collects wall-clock time per pipeline stage."""
+
+    def __init__(self):
+        self.timings = []
+
+    def run(self, name, func, *args):
+        logging.info(f"--- {name} ---")
+        start = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            self.timings.append((name, time.perf_counter() - start))
+
+    def report(self):
+        total = sum(t for _, t in self.timings)
+        width = max(len(name) for name, _ in self.timings)
+        print("\nStage timings:")
+        for name, elapsed in self.timings:
+            print(f"  {name:<{width}}  {elapsed:8.3f}s")
+        print(f"  {'total':<{width}}  {total:8.3f}s")
+
+
+def write_playlist(path, playlist):
+    playlist.write(path)
+    logging.info(f"Wrote {path}")
+
+
+def fetch_sources():
+    import m3u  # only needed when sources are fetched
+    return m3u.main([])
+
+
+def build_epg():
+    """Convert the schedule JSON straight into an in-memory XMLTV tree."""
+    with open(SCHEDULE_FILE, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    buf = io.StringIO()
+    json_to_epg.stream_epg(data, buf)
+    return ET.fromstring(buf.getvalue())
+
+
+def apply_known_ids(root):
+    known_ids = match_epg.load_known_ids(KNOWN_IDS_FILE)
+    if known_ids is not None:
+        match_epg.apply_known_ids(root, known_ids)
+
+
+def match_playlist(channels):
+    playlist = read_playlist(PLAYLIST_FILE)
+    added = match_epg.add_tvg_ids(playlist.entries, match_epg.build_epg_mapping(channels))
+    logging.info(f"{added} tvg-ids added to {PLAYLIST_FILE}")
+    return playlist
+
+
+def organize_by_country(playlist, channels):
+    known_ids = country.load_known_channel_ids(KNOWN_IDS_FILE)
+    return country.organize_entries(playlist.entries, known_ids, country.build_epg_map(channels))
+
+
+def add_playlist_logos(playlist):
+    logos = logos_m3u.get_logo_files(logos_m3u.LOGO_DIR)
+    matched, fallbacks = logos_m3u.add_logos_to_entries(playlist.entries, logos)
+    logging.info(f"Completed logo matching. Matched: {matched}, Fallbacks: {fallbacks}")
+
+
+def add_epg_logos(root):
+    logo_index, cache = logos_epg.load_logo_matching()
+    added = sum(logos_epg.add_logo_to_channel(channel, cache, logo_index) for channel in root.findall("channel"))
+    logging.info(f"Added/updated logos for {added} channels.")
+    logos_epg.save_cache(cache)
+
+
+def write_epg(root):
+    ET.ElementTree(root).write(EPG_FILE, encoding="utf-8", xml_declaration=True)
+    logging.info(f"Wrote {EPG_FILE}")
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Run the playlist/EPG pipeline in a single process.")
+    arg_parser.add_argument("--skip-sources", action="store_true",
+                            help="don't fetch the playlists/schedule again, use the files already on disk")
+    arg_parser.add_argument("--write-intermediates", action="store_true",
+                            help=f"also write {MATCHED_FILE} and {COUNTRY_FILE} for debugging")
+    arg_parser.add_argument("--merge-guides", action="store_true",
+                            help=f"also write {merge_epg.OUTPUT_FILE} from the epgshare guides in epg/")
+    args = arg_parser.parse_args(argv)
+
+    timer = StageTimer()
+
+    if not args.skip_sources:
+        status = timer.run("fetch sources", fetch_sources)
+        if status:
+            logging.error("Every source failed, nothing to build from.")
+            timer.report()
+            return status
+
+    root = timer.run("schedule -> EPG", build_epg)
+    timer.run("known channel ids", apply_known_ids, root)
+    channels = [channel_record(channel) for channel in root.findall("channel")]
+
+    playlist = timer.run("match playlist to EPG", match_playlist, channels)
+    if args.write_intermediates:
+        write_playlist(MATCHED_FILE, playlist)
+
+    playlist = timer.run("country categories", organize_by_country, playlist, channels)
+    if playlist is None:
+        logging.warning(f"No DLHD 24/7 or Live Event channels found, leaving {OUTPUT_FILE} unchanged.")
+    else:
+        if args.write_intermediates:
+            write_playlist(COUNTRY_FILE, playlist)
+        timer.run("playlist logos", add_playlist_logos, playlist)
+        write_playlist(OUTPUT_FILE, playlist)
+
+    timer.run("EPG logos", add_epg_logos, root)
+    timer.run("write EPG", write_epg, root)
+
+    if args.merge_guides and playlist is not None:
+        timer.run("merge epgshare guides", merge_epg.merge, OUTPUT_FILE)
+
+    timer.report()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,190 @@
+import re
+import sys
+import time
+
+# ---- CONFIGURATION ----
+BENCHMARK_FILE = "vavoo.m3u"
+BENCHMARK_ROUNDS = 5
+
+EXTINF_PREFIX = "#EXTINF:"
+DURATION_RE = re.compile(r'\s*([^\s,]*)')
+# One key="value" attribute. Stray quotes before it are skipped, which is how older runs
+# corrupted lines ('group-title="Africa"" tvg-logo=...') get repaired on the next pass.
+PAIR_RE = re.compile(r' ([^\s=",]+)="([^"]*)"')
+ATTR_RE = re.compile(r'[\s"]*([^\s=",]+)="([^"]*)"')
+UNQUOTED_ATTR_RE = re.compile(r'[\s"]*([^\s=",]+)=([^\s",]*)')
+NAME_RE = re.compile(r'[^,]*,(.*)')
+
+
+class Entry:
+    """
+    One playlist entry: the #EXTINF attributes (in order), the display name, the stream URL and
+    any directives (#EXTVLCOPT, ...) between the two. leading keeps the raw lines (blank lines,
+    "# CATEGORY" comments) that preceded the entry so an untouched playlist round-trips as-is.
+    """
+    __slots__ = ("name", "url", "attrs", "extras", "duration", "leading")
+
+    def __init__(self, name, url=None, attrs=None, extras=None, duration="-1", leading=None):
+        self.name = name
+        self.url = url
+        self.attrs = attrs if attrs is not None else {}
+        self.extras = extras if extras is not None else []
+        self.duration = duration
+        self.leading = leading if leading is not None else []
+
+    def serialize(self):
+        """The entry as playlist text (leading lines, #EXTINF, directives, URL) in a single join."""
+        parts = self.leading + [EXTINF_PREFIX, self.duration]
+        for key, value in self.attrs.items():
+            parts += (" ", key, '="', value, '"')
+        parts += (",", self.name, "\n")
+        for extra in self.extras:
+            parts += (extra, "\n")
+        if self.url is not None:
+            parts += (self.url, "\n")
+        return "".join(parts)
+
+    def __repr__(self):
+        return f"Entry({self.name!r}, {self.url!r}, {self.attrs!r})"
+
+
+class Playlist:
+    """A parsed playlist: header lines (#EXTM3U, ...), entries and whatever follows the last one."""
+    __slots__ = ("header", "entries", "trailer")
+
+    def __init__(self, entries=None, header=None, trailer=None):
+        self.entries = entries if entries is not None else []
+        self.header = header if header is not None else ["#EXTM3U\n"]
+        self.trailer = trailer if trailer is not None else []
+
+    def serialize(self):
+        return "".join(self.header) + "".join(e.serialize() for e in self.entries) + "".join(self.trailer)
+
+    def write(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.serialize())
+
+
+def parse_extinf(line):
+    """Split an #EXTINF line into (duration, attributes dict, name) in a single left-to-right pass."""
+    head, sep, name = line.partition(",")
+    if sep:
+        # Common case: ' key="value"' pairs up to the first comma. Accept it only if the pairs
+        # account for every character of the head; anything unusual takes the slow path below.
+        duration, _, _ = head[len(EXTINF_PREFIX):].partition(" ")
+        pairs = PAIR_RE.findall(head)
+        if len(head) == len(EXTINF_PREFIX) + len(duration) + sum(len(k) + len(v) + 4 for k, v in pairs):
+            return duration, dict(pairs), name.strip()
+
+    line = line.rstrip("\r\n")
+    m = DURATION_RE.match(line, len(EXTINF_PREFIX))
+    duration = m.group(1)
+    pos = m.end()
+
+    attrs = {}
+    while True:
+        m = ATTR_RE.match(line, pos) or UNQUOTED_ATTR_RE.match(line, pos)
+        if not m:
+            break
+        attrs[m.group(1)] = m.group(2)
+        pos = m.end()
+
+    m = NAME_RE.match(line, pos)
+    name = m.group(1).strip() if m else ""
+    return duration, attrs, name
+
+
+def parse_lines(lines):
+    """Build a Playlist from the lines of an M3U file."""
+    playlist = Playlist(header=[])
+    pending = playlist.header  # raw lines not yet attached to an entry
+    entry = None
+
+    for line in lines:
+        if line.startswith("#EXTINF"):
+            duration, attrs, name = parse_extinf(line)
+            entry = Entry(name, None, attrs, duration=duration, leading=pending if playlist.entries else [])
+            playlist.entries.append(entry)
+            pending = []
+        elif entry is not None and entry.url is None and line.strip():
+            if line.startswith("#"):
+                entry.extras.append(line.rstrip("\r\n"))
+            else:
+                entry.url = line.strip()
+        else:
+            pending.append(line)
+
+    playlist.trailer = pending if playlist.entries else []
+    return playlist
+
+
+def read_playlist(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return parse_lines(f)
+
+
+def _regex_edits(lines, tvg_id, group, logo_url):
+    """
+    The per-line regex edits the stages made before the Entry model (tvg-id, group-title,
+    tvg-logo; one pass per stage), kept only as the baseline for benchmark().
+    """
+    out = []
+    for line in lines:
+        if line.startswith("#EXTINF") and not re.search(r'tvg-id="([^"]+)"', line):
+            line = re.sub(r'(#EXTINF:-1)', rf'\1 tvg-id="{tvg_id}"', line)
+        out.append(line)
+    lines, out = out, []
+    for line in lines:
+        if line.startswith("#EXTINF"):
+            line = re.sub(r'group-title="[^"]*"', f'group-title="{group}"', line.strip()) + "\n"
+        out.append(line)
+    lines, out = out, []
+    for line in lines:
+        if line.startswith("#EXTINF") and re.search(r",(.+)", line):
+            if 'tvg-logo="' in line:
+                line = re.sub(r'tvg-logo="[^"]*"', f'tvg-logo="{logo_url}"', line)
+            else:
+                line = line.strip().replace(",", f' tvg-logo="{logo_url}",', 1) + "\n"
+        out.append(line)
+    return "".join(out)
+
+
+def _entry_edits(lines, tvg_id, group, logo_url):
+    playlist = parse_lines(lines)
+    for entry in playlist.entries:
+        if not entry.attrs.get("tvg-id"):
+            entry.attrs["tvg-id"] = tvg_id
+        entry.attrs["group-title"] = group
+        entry.attrs["tvg-logo"] = logo_url
+    return playlist.serialize()
+
+
+def benchmark(path=BENCHMARK_FILE, rounds=BENCHMARK_ROUNDS):
+    """Time parse/serialize of path, and the tvg-id/group-title/tvg-logo edits against the old regexes."""
+    with open(path, "r", encoding="utf-8") as f:
+        lines = f.readlines()
+    parsed = parse_lines(lines)
+    if parsed.serialize() != "".join(lines):
+        print(f"WARNING: {path} does not round-trip unchanged")
+
+    edits = ("some.id", "Some Group", "https://example.com/logo.png")
+    cases = [
+        ("parse", lambda: parse_lines(lines)),
+        ("serialize", parsed.serialize),
+        ("Entry: parse + edits + write", lambda: _entry_edits(lines, *edits)),
+        ("regex edits per line", lambda: _regex_edits(lines, *edits)),
+    ]
+
+    print(f"{path}: {len(lines)} lines, {len(parsed.entries)} entries (best of {rounds})")
+    for label, func in cases:
+        best = None
+        for _ in range(rounds):
+            start = time.perf_counter()
+            func()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        print(f"  {label:<30} {best * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    benchmark(sys.argv[1] if len(sys.argv) > 1 else BENCHMARK_FILE)
@@ -0,0 +1,259 @@
+import re
+import sys
+import time
+from xml.sax.saxutils import escape
+
+# ---- CONFIGURATION ----
+BENCHMARK_ROUNDS = 5
+
+CHANNEL_ID_RE = re.compile(r'(?:watch|stream)-(\d+)\.php')
+CHANNEL_ID_PARAM_RE = re.compile(r'id=(\d+)')
+
+
+def lxml_available():
+    try:
+        import lxml.html  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def html_to_json(html_content, backend=None):
+    """
+    Parse the DaddyLive schedule page into {day: {category: [event, ...]}}.
+
+    backend is "lxml" or "bs4"; by default lxml is used when it is installed and
+    BeautifulSoup otherwise. Both produce the same result.
+    """
+    if backend is None:
+        backend = "lxml" if lxml_available() else "bs4"
+    if backend == "lxml":
+        return html_to_json_lxml(html_content)
+    return html_to_json_bs4(html_content)
+
+
+def channel_cards(html_content, backend=None):
+    """(title, href) of every <a class="card"> with a card__title on the 24/7 channels page."""
+    if backend is None:
+        backend = "lxml" if lxml_available() else "bs4"
+    if backend == "lxml":
+        return channel_cards_lxml(html_content)
+    return channel_cards_bs4(html_content)
+
+
+def find_channel_id(href):
+    match = CHANNEL_ID_RE.search(href) or CHANNEL_ID_PARAM_RE.search(href)
+    return match.group(1) if match else None
+
+
+# ---- BeautifulSoup ----
+
+def html_to_json_bs4(html_content):
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html_content, 'html.parser')
+    result = {}
+
+    schedule_days = soup.find_all('div', class_='schedule__day')
+    if not schedule_days:
+        print("WARNING: No 'schedule__day' found in HTML content!")
+        return {}
+
+    for day_div in schedule_days:
+        day_title_div = day_div.find('div', class_='schedule__dayTitle')
+        if not day_title_div:
+            continue
+        current_date = day_title_div.get_text(strip=True)
+        result[current_date] = {}
+
+        for category_div in day_div.find_all('div', class_='schedule__category'):
+            cat_header = category_div.find('div', class_='schedule__catHeader')
+            if not cat_header:
+                continue
+
+            # We use the inner HTML to keep any tags, as before
+            current_category_html = cat_header.find('div', class_='card__meta').decode_contents()
+            current_category = current_category_html.strip() + "</span>" # Maintains compatibility with previous format
+            result[current_date][current_category] = []
+
+            for event_div in category_div.find_all('div', class_='schedule__event'):
+                event_header = event_div.find('div', class_='schedule__eventHeader')
+                if not event_header:
+                    continue
+
+                time_span = event_header.find('span', class_='schedule__time')
+                event_title_span = event_header.find('span', class_='schedule__eventTitle')
+
+                event_time = time_span.get_text(strip=True) if time_span else ""
+                event_info = event_title_span.get_text(strip=True) if event_title_span else ""
+
+                event_data = {
+                    "time": event_time,
+                    "event": event_info,
+                    "channels": []
+                }
+
+                channels_div = event_div.find('div', class_='schedule__channels')
+                if channels_div:
+                    for link in channels_div.find_all('a'):
+                        channel_id = find_channel_id(link.get('href', ''))
+                        if channel_id:
+                            event_data["channels"].append({
+                                "channel_name": link.get_text(strip=True),
+                                "channel_id": channel_id
+                            })
+                result[current_date][current_category].append(event_data)
+    return result
+
+
+def channel_cards_bs4(html_content):
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html_content, 'html.parser')
+    cards = []
+    for card in soup.find_all('a', class_='card'):
+        title_div = card.find('div', class_='card__title')
+        if title_div:
+            cards.append((title_div.text.strip(), card.get('href', '')))
+    return cards
+
+
+# ---- lxml ----
+
+def class_xpath(tag, class_name):
+    """Descendant <tag>s with class_name among their classes, as BeautifulSoup's class_= matches."""
+    return f"descendant::{tag}[contains(concat(' ', normalize-space(@class), ' '), ' {class_name} ')]"
+
+
+_xpaths = {}
+
+
+def select(elem, tag, class_name):
+    """All matching descendants of elem in document order (BeautifulSoup find_all)."""
+    key = (tag, class_name)
+    if key not in _xpaths:
+        from lxml import etree
+        _xpaths[key] = etree.XPath(class_xpath(tag, class_name))
+    return _xpaths[key](elem)
+
+
+def select_one(elem, tag, class_name):
+    """The first matching descendant of elem, or None (BeautifulSoup find)."""
+    found = select(elem, tag, class_name)
+    return found[0] if found else None
+
+
+def text_of(elem, strip=False):
+    """BeautifulSoup's get_text() / get_text(strip=True) for an lxml element."""
+    # get_text() skips <script>/<style> contents, so leave them out here too
+    texts = elem.xpath("descendant::text()[not(ancestor::script or ancestor::style)]")
+    if strip:
+        return "".join(t.strip() for t in texts if t.strip())
+    return "".join(texts)
+
+
+def inner_html(elem):
+    """BeautifulSoup's decode_contents() for an lxml element."""
+    if len(elem) == 0:
+        return escape(elem.text or "")
+    # Markup inside: let BeautifulSoup serialize it so tags and entities come out the same
+    from bs4 import BeautifulSoup
+    from lxml import html as lxml_html
+
+    return BeautifulSoup(lxml_html.tostring(elem, encoding="unicode"), 'html.parser').div.decode_contents()
+
+
+def parse_document(html_content):
+    from lxml import html as lxml_html
+
+    if not html_content or not html_content.strip():
+        return None
+    return lxml_html.document_fromstring(html_content)
+
+
+def html_to_json_lxml(html_content):
+    root = parse_document(html_content)
+    result = {}
+
+    schedule_days = select(root, 'div', 'schedule__day') if root is not None else []
+    if not schedule_days:
+        print("WARNING: No 'schedule__day' found in HTML content!")
+        return {}
+
+    for day_div in schedule_days:
+        day_title_div = select_one(day_div, 'div', 'schedule__dayTitle')
+        if day_title_div is None:
+            continue
+        current_date = text_of(day_title_div, strip=True)
+        result[current_date] = {}
+
+        for category_div in select(day_div, 'div', 'schedule__category'):
+            cat_header = select_one(category_div, 'div', 'schedule__catHeader')
+            if cat_header is None:
+                continue
+
+            current_category = inner_html(select_one(cat_header, 'div', 'card__meta')).strip() + "</span>"
+            result[current_date][current_category] = []
+
+            for event_div in select(category_div, 'div', 'schedule__event'):
+                event_header = select_one(event_div, 'div', 'schedule__eventHeader')
+                if event_header is None:
+                    continue
+
+                time_span = select_one(event_header, 'span', 'schedule__time')
+                event_title_span = select_one(event_header, 'span', 'schedule__eventTitle')
+
+                event_data = {
+                    "time": text_of(time_span, strip=True) if time_span is not None else "",
+                    "event": text_of(event_title_span, strip=True) if event_title_span is not None else "",
+                    "channels": []
+                }
+
+                channels_div = select_one(event_div, 'div', 'schedule__channels')
+                if channels_div is not None:
+                    for link in channels_div.iterdescendants('a'):
+                        channel_id = find_channel_id(link.get('href', ''))
+                        if channel_id:
+                            event_data["channels"].append({
+                                "channel_name": text_of(link, strip=True),
+                                "channel_id": channel_id
+                            })
+                result[current_date][current_category].append(event_data)
+    return result
+
+
+def channel_cards_lxml(html_content):
+    root = parse_document(html_content)
+    cards = []
+    if root is None:
+        return cards
+    for card in select(root, 'a', 'card'):
+        title_div = select_one(card, 'div', 'card__title')
+        if title_div is not None:
+            cards.append((text_of(title_div).strip(), card.get('href', '')))
+    return cards
+
+
+def benchmark(schedule_path, cards_path, rounds=BENCHMARK_ROUNDS):
+    """Time both backends on saved copies of the schedule and 24/7 pages and check they agree."""
+    with open(schedule_path, "r", encoding="utf-8") as f:
+        schedule_page = f.read()
+    with open(cards_path, "r", encoding="utf-8") as f:
+        cards_page = f.read()
+
+    for label, func, page in (("html_to_json", html_to_json, schedule_page), ("channel_cards", channel_cards, cards_page)):
+        results = {}
+        for backend in ("bs4", "lxml"):
+            best = float("inf")
+            for _ in range(rounds):
+                start = time.perf_counter()
+                results[backend] = func(page, backend)
+                best = min(best, time.perf_counter() - start)
+            print(f"{label:<14} {backend:<5} {best * 1000:9.1f} ms")
+        print(f"{label:<14} identical: {results['bs4'] == results['lxml']}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        sys.exit("usage: python schedule_html.py SAVED_SCHEDULE.html SAVED_24-7.html")
+    benchmark(sys.argv[1], sys.argv[2])
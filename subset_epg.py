@@ -0,0 +1,124 @@
+import os
+import sys
+import gzip
+import shutil
+import logging
+import argparse
+import tempfile
+import xml.etree.ElementTree as ET
+
+from epg_reader import iter_elements
+from playlist import read_playlist
+
+# --- CONFIGURATION ---
+DEFAULT_SOURCES = ["epg.xml"]
+COMPRESS_LEVEL = 9  # written once, downloaded by every client
+
+
+def playlist_references(playlist_path, group=None):
+    """
+    The tvg-ids and lowercased channel names a playlist refers to, optionally limited to one
+    group-title. Names only matter for entries without a tvg-id (vavoo, sportsonline).
+    """
+    ids, names = set(), set()
+    for entry in read_playlist(playlist_path).entries:
+        if group is not None and entry.attrs.get("group-title") != group:
+            continue
+        tvg_id = entry.attrs.get("tvg-id")
+        if tvg_id:
+            ids.add(tvg_id)
+        else:
+            name = entry.attrs.get("tvg-name") or entry.name
+            if name and name.strip():
+                names.add(name.strip().lower())
+    return ids, names
+
+
+def subset_epg(sources, output_path, ids, names=()):
+    """
+    Stream every source and write output_path (gzip-compressed when it ends in .gz) with only
+    the <channel>s whose id is in ids or whose display name is in names, and their programmes.
+
+    Each channel id is taken from the first source that mentions it, so the same schedule
+    from two guides is never written twice. Channels go straight to the output and programmes
+    to a spool file appended after them, keeping the XMLTV order with flat memory.
+    Matching by name only sees channels listed before their programmes, as in epgshare guides.
+    Returns (channels written, programmes written).
+    """
+    owner = {}  # channel id -> index of the source it is taken from
+    channel_count = programme_count = 0
+    tmp_path = output_path + ".tmp"
+    if output_path.endswith(".gz"):
+        out = gzip.open(tmp_path, "wt", encoding="utf-8", errors="xmlcharrefreplace", compresslevel=COMPRESS_LEVEL)
+    else:
+        out = open(tmp_path, "w", encoding="utf-8", errors="xmlcharrefreplace")
+
+    with out, tempfile.TemporaryFile("w+", encoding="utf-8", errors="xmlcharrefreplace") as spool:
+        out.write("<?xml version='1.0' encoding='utf-8'?>\n<tv>")
+        for index, source in enumerate(sources):
+            try:
+                for _, elem in iter_elements(source):
+                    if elem.tag == "programme":
+                        channel_id = elem.get("channel")
+                        if channel_id in ids:
+                            owner.setdefault(channel_id, index)
+                        if owner.get(channel_id) == index:
+                            elem.tail = None
+                            spool.write(ET.tostring(elem, encoding="unicode"))
+                            programme_count += 1
+                    elif elem.tag == "channel":
+                        channel_id = elem.get("id")
+                        if not channel_id or owner.get(channel_id, index) != index:
+                            continue
+                        if channel_id not in ids and not any(
+                            (dn.text or "").strip().lower() in names for dn in elem.findall("display-name")
+                        ):
+                            continue
+                        if owner.setdefault(channel_id, index) == index:
+                            elem.tail = None
+                            out.write(ET.tostring(elem, encoding="unicode"))
+                            channel_count += 1
+            except Exception as e:
+                # Keep what the other sources give; a half-read source still contributes its start
+                logging.error(f"Failed to read {source}: {e}")
+        spool.seek(0)
+        shutil.copyfileobj(spool, out)
+        out.write("</tv>")
+    os.replace(tmp_path, output_path)
+    return channel_count, programme_count
+
+
+def default_output(playlist_path, group=None):
+    base = os.path.splitext(os.path.basename(playlist_path))[0]
+    if group:
+        base += "_" + "".join(c if c.isalnum() else "_" for c in group.lower()).strip("_")
+    return base + ".xml.gz"
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(
+        description="Write a (gzip) guide with only the channels a playlist refers to and their programmes."
+    )
+    arg_parser.add_argument("playlist")
+    arg_parser.add_argument("sources", nargs="*", default=DEFAULT_SOURCES,
+                            help="XMLTV files, plain or .gz (default: epg.xml)")
+    arg_parser.add_argument("--group", help='only entries with this group-title, e.g. "Albania VAVOO"')
+    arg_parser.add_argument("--output", help="defaults to <playlist>[_<group>].xml.gz")
+    args = arg_parser.parse_args(argv)
+
+    ids, names = playlist_references(args.playlist, args.group)
+    logging.info(f"{args.playlist}: {len(ids)} tvg-ids, {len(names)} channel names without tvg-id")
+    output_path = args.output or default_output(args.playlist, args.group)
+
+    channels, programmes = subset_epg(args.sources, output_path, ids, names)
+    source_size = sum(os.path.getsize(s) for s in args.sources if os.path.exists(s))
+    output_size = os.path.getsize(output_path)
+    logging.info(
+        f"Wrote {output_path}: {channels} channels, {programmes} programmes, "
+        f"{output_size / 1024:.1f} KiB from {source_size / 1024:.1f} KiB of sources"
+    )
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    sys.exit(main())
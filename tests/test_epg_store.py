@@ -0,0 +1,59 @@
+import os
+import sys
+import gzip
+import xml.etree.ElementTree as ET
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import epg_store
+from epg_reader import parse_iso_time
+
+
+def write_guide(path, channel_name, programmes):
+    xml = [f'<tv><channel id="ESPN.br"><display-name>{channel_name}</display-name></channel>']
+    for start, title in programmes:
+        xml.append(f'<programme start="{start} +0000" stop="{start[:8]}235900 +0000" channel="ESPN.br">'
+                   f'<title>{title}</title></programme>')
+    xml.append("</tv>")
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        f.write("".join(xml))
+
+
+def export(tmp_path, db_path, start=None, stop=None):
+    output = str(tmp_path / "out.xml")
+    epg_store.export_xmltv(output, ["ESPN.br"], start, stop, db_path=db_path)
+    root = ET.parse(output).getroot()
+    return [c.findtext("display-name") for c in root.findall("channel")], \
+        [p.findtext("title") for p in root.findall("programme")]
+
+
+def test_shared_channel_id_comes_from_one_guide(tmp_path):
+    guide_a = str(tmp_path / "epg_ripper_A1.xml.gz")
+    guide_b = str(tmp_path / "epg_ripper_B1.xml.gz")
+    write_guide(guide_a, "ESPN A", [("20260101120000", "a1"), ("20260102120000", "a2")])
+    write_guide(guide_b, "ESPN B", [("20260101120000", "b1"), ("20260103120000", "b2"), ("20260104120000", "b3")])
+
+    db_path = str(tmp_path / "epg.sqlite")
+    epg_store.ingest(db_path, [guide_b, guide_a], max_workers=1)
+    assert export(tmp_path, db_path) == (["ESPN A"], ["a1", "a2"])
+
+    # Re-ingesting in the other order (B's rows now newer) must not change the owner
+    write_guide(guide_a, "ESPN A", [("20260101120000", "a1")])
+    epg_store.ingest(db_path, [guide_a, guide_b], max_workers=1)
+    assert export(tmp_path, db_path) == (["ESPN A"], ["a1"])
+
+
+def test_owner_is_chosen_among_guides_with_programmes_in_the_window(tmp_path):
+    guide_a = str(tmp_path / "epg_ripper_A1.xml.gz")
+    guide_b = str(tmp_path / "epg_ripper_B1.xml.gz")
+    write_guide(guide_a, "ESPN A", [("20260101120000", "a1")])
+    write_guide(guide_b, "ESPN B", [("20260105120000", "b1"), ("20260106120000", "b2")])
+
+    db_path = str(tmp_path / "epg.sqlite")
+    epg_store.ingest(db_path, [guide_a, guide_b], max_workers=1)
+    start = parse_iso_time("2026-01-05T00:00Z").timestamp()
+    assert export(tmp_path, db_path, start=start) == (["ESPN B"], ["b1", "b2"])
+
+    # Nothing in the window at all: the channel still comes from the first guide
+    start = parse_iso_time("2026-02-01T00:00Z").timestamp()
+    assert export(tmp_path, db_path, start=start) == (["ESPN A"], [])
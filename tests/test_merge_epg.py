@@ -0,0 +1,27 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import merge_epg
+from guide_index import GuideIndex
+
+
+def guide_index():
+    return GuideIndex({"guides": {
+        "epg_ripper_US1.xml.gz": {"channels": {"Foo.us": [["Foo"], None, 10]}},
+        "epg_ripper_UK1.xml.gz": {"channels": {"Foo.uk": [["Foo"], None, 12]}},
+    }})
+
+
+def test_country_suffix_keeps_only_that_country():
+    sources, _ = merge_epg.resolve_sources({"foo_usa": "Foo", "foo.uk": "Foo"}, guide_index())
+    assert sources == {"epg_ripper_US1.xml.gz": {"Foo.us": "foo_usa"},
+                       "epg_ripper_UK1.xml.gz": {"Foo.uk": "foo.uk"}}
+
+
+def test_non_country_suffix_keeps_every_name_match():
+    for tvg_id in ("foo.tv", "foo_hd"):
+        sources, _ = merge_epg.resolve_sources({tvg_id: "Foo"}, guide_index())
+        assert sources == {"epg_ripper_US1.xml.gz": {"Foo.us": tvg_id},
+                           "epg_ripper_UK1.xml.gz": {"Foo.uk": tvg_id}}